@@ -8,18 +8,25 @@
 
 import os
 import re
+import sys
 import json
+import time
 import base64
 import unicodedata
 from datetime import datetime
 from pathlib import Path
-from typing import List, Tuple, Optional, Dict
+from typing import List, Tuple, Optional, Dict, NamedTuple
 import io
 import tempfile 
+import threading
 
 import streamlit as st
 import streamlit.components.v1 as components
 
+from normalizacao import normalizar_pergunta # mesma chave usada pelo lote.py
+from resiliencia import Prazo, Disjuntor, registrar_falha # classes puras, testadas em tests/
+from fontes import FonteStore
+
 # =========================
 # CONFIG / ASSETS
 # =========================
@@ -103,22 +110,87 @@ except Exception:
 try:
     import requests
     from trafilatura import fetch_url, extract
+    import extracao # extract() roda num pool de processos (ver extracao.py)
     HAS_SCRAPER = True
 except Exception:
     HAS_SCRAPER = False
     requests = None
     fetch_url = None
     extract = None
+
+# Acervo local pré-extraído pelo crawler (crawler.py)
+try:
+    import crawler
+    HAS_ACERVO = True
+except Exception:
+    crawler = None
+    HAS_ACERVO = False
+
+# Intervalo (s) do crawler em segundo plano; 0 (padrão) desativa. Em produção, prefira
+# rodar `python crawler.py --loop` num processo só; a trava em acervo/ evita passadas simultâneas
+try:
+    CRAWLER_INTERVALO = float(_get_secret("crawler", "intervalo", default="0"))
+except ValueError:
+    CRAWLER_INTERVALO = 0.0
+
+@st.cache_resource(show_spinner=False)
+def iniciar_crawler(intervalo: float):
+    """Sobe UMA thread de crawler por processo (compartilhada entre sessões)."""
+    parar = threading.Event()
+    t = threading.Thread(target=crawler.executar_continuamente,
+                         args=(crawler.BuscadorHTTP(), intervalo, parar),
+                         kwargs={"log": lambda *_: None},
+                         name="crawler-acervo", daemon=True)
+    t.start()
+    return parar
+
+if HAS_ACERVO and HAS_SCRAPER and CRAWLER_INTERVALO > 0:
+    iniciar_crawler(CRAWLER_INTERVALO)
     
+# =========================
+# HISTÓRICO COMPACTO + FONTES COMPARTILHADAS
+# =========================
+MAX_HIST = 40                        # mensagens por sessão (as mais antigas saem, a saudação fica)
+HIST_BLOCO = 6                       # mensagens saem do histórico/da janela do LLM em blocos deste tamanho
+MAX_MSG_CHARS = 4000                 # corta mensagens enormes (ex.: textos colados) no histórico
+FONTES_MAX_BYTES = 64 * 1024 * 1024  # teto do repositório de fontes do processo
+
+class Msg(NamedTuple):
+    """Entrada do histórico: tupla sem __dict__; `fontes` guarda só chaves do FonteStore."""
+    who: str
+    msg: str
+    emo: Optional[str] = None
+    fontes: Tuple[str, ...] = ()
+
+@st.cache_resource(show_spinner=False)
+def fonte_store() -> FonteStore:
+    return FonteStore(FONTES_MAX_BYTES)
+
+def hist_append(who: str, msg: str, emo: Optional[str] = None, fontes: Optional[list] = None) -> None:
+    hist = st.session_state.hist
+    hist.append(Msg(who, (msg or "")[:MAX_MSG_CHARS], emo, fonte_store().guardar(fontes)))
+    if len(hist) > MAX_HIST:
+        # Em blocos (e não uma por vez): mantém o alinhamento da janela de _last_msgs
+        excesso = len(hist) - MAX_HIST
+        del hist[1:1 + -(-excesso // HIST_BLOCO) * HIST_BLOCO]
+
+def memoria_sessao() -> int:
+    """Estimativa (bytes) do que esta sessão guarda no histórico."""
+    hist = st.session_state.get("hist", [])
+    total = sys.getsizeof(hist)
+    for m in hist:
+        total += sys.getsizeof(m) + sys.getsizeof(m[1]) + sys.getsizeof(m[3] or ())
+        total += sum(sys.getsizeof(k) for k in (m[3] or ()))
+    return total
+
 # =========================
 # ESTADO
 # =========================
 if "hist" not in st.session_state:
-    st.session_state.hist: List[Tuple] = [
-        ("bot",
-         "Olá! Eu sou o **Aprendiz**, do **Conecta Senac**. Posso conversar sobre cursos, inscrições, EAD, unidades e também sobre como eu funciono. Como posso te ajudar?",
-         "feliz",
-         None)
+    st.session_state.hist: List[Msg] = [
+        Msg("bot",
+            "Olá! Eu sou o **Aprendiz**, do **Conecta Senac**. Posso conversar sobre cursos, inscrições, EAD, unidades e também sobre como eu funciono. Como posso te ajudar?",
+            "feliz")
     ]
 if "awaiting_location" not in st.session_state:
     st.session_state.awaiting_location = False
@@ -128,8 +200,6 @@ if "dark_mode" not in st.session_state:
     st.session_state.dark_mode = False
 if "font_size" not in st.session_state:
     st.session_state.font_size = 1.0
-if "avatars" not in st.session_state:
-    st.session_state.avatars = {}
 if "tts_enabled" not in st.session_state:
     st.session_state.tts_enabled = False
 if "stt_enabled" not in st.session_state:
@@ -145,7 +215,7 @@ def _load_image(path: str) -> Optional[str]:
     except Exception:
         return None
 
-@st.cache_data(show_spinner=False)
+@st.cache_resource(show_spinner=False) # Um único dict por processo (cache_data devolveria uma cópia por chamada)
 def carregar_avatars_cached(avatar_dir: str) -> dict:
     nomes = ["feliz", "neutro", "pensando", "triste", "duvida"]
     avatars = {}
@@ -157,16 +227,47 @@ def carregar_avatars_cached(avatar_dir: str) -> dict:
                 avatars[n] = img
     return avatars
 
-if not st.session_state.get("avatars"):
-    st.session_state.avatars = carregar_avatars_cached(AVATAR_DIR)
+AVATARS = carregar_avatars_cached(AVATAR_DIR)
 
 def avatar_img(emocao: str) -> str:
-    avatars = st.session_state.get("avatars", {})
-    b64img = avatars.get(emocao)
+    b64img = AVATARS.get(emocao)
     if not b64img:
         return "<div class='avatar-emoji'>🎓</div>"
     return f"""<img class='avatar-img' src="data:image/png;base64,{b64img}" alt="{emocao}"/>"""
 
+# =========================
+# ACERVO LOCAL (crawler)
+# =========================
+@st.cache_resource(ttl=300, show_spinner=False) # Relê o acervo a cada 5 min; lista compartilhada (sem cópia)
+def carregar_acervo_cached() -> list:
+    if not HAS_ACERVO:
+        return []
+    try:
+        return crawler.carregar_acervo()
+    except Exception:
+        return []
+
+# =========================
+# SAÚDE DOS PROVEDORES DE BUSCA (circuit breaker)
+# =========================
+DISJUNTOR_FALHAS = 3        # falhas seguidas que abrem o disjuntor
+DISJUNTOR_ESPERA_S = 60.0   # tempo aberto antes de deixar UMA chamada de teste passar
+BUSCA_NEGATIVA_TTL_S = 60.0 # buscas vazias/falhas ficam em cache só por esse tempo
+DISJUNTOR_TIMEOUT_MIN_S = 3.0  # estourar um timeout de pelo menos isso conta como falha do provedor
+
+def _falha_provedor(dj: Disjuntor, erro: Exception, timeout: Optional[float]) -> None:
+    registrar_falha(dj, erro, timeout, DISJUNTOR_TIMEOUT_MIN_S)
+
+@st.cache_resource(show_spinner=False)
+def disjuntores() -> Dict[str, Disjuntor]:
+    return {"tavily": Disjuntor("Tavily", DISJUNTOR_FALHAS, DISJUNTOR_ESPERA_S),
+            "ddgs": Disjuntor("DDGS", DISJUNTOR_FALHAS, DISJUNTOR_ESPERA_S)}
+
+@st.cache_resource(show_spinner=False)
+def busca_negativa() -> Dict[tuple, float]:
+    """(query, max_results) → instante (monotonic) em que a busca pode ser tentada de novo."""
+    return {}
+
 # =========================
 # SIDEBAR
 # =========================
@@ -180,6 +281,12 @@ with st.sidebar:
     web_toggle = st.toggle("🔎 Ativar pesquisa web quando fizer sentido", value=True)
     st.caption(f"LLM: {'OpenAI' if llm_client else '⚠️ não configurado'}")
     st.caption(f"Busca: {'Tavily' if TAVILY_KEY else ('DDGS' if DDGS else '⚠️ indisponível')}")
+    for chave, dj in disjuntores().items():
+        if (chave == "tavily" and not TAVILY_KEY) or (chave == "ddgs" and DDGS is None):
+            continue
+        icone = {"fechado": "🟢", "meio-aberto": "🟡", "aberto": "🔴"}[dj.estado]
+        st.caption(f"{dj.nome}: {icone} {dj.estado} • ok {dj.total_ok} / falhas {dj.total_falhas}"
+                   + (f" • último erro: {dj.ultimo_erro}" if dj.estado != Disjuntor.FECHADO else ""))
     
     # Diagnóstico e instrução
     st.caption(f"Status do Áudio: {'Sucesso' if HAS_STT else 'FALHA'}")
@@ -189,6 +296,10 @@ with st.sidebar:
     # *** NOVO: Diagnóstico do Scraper ***
     if web_toggle and not HAS_SCRAPER:
         st.warning("Libs 'requests' ou 'trafilatura' não econtradas. A leitura de artigos está desativada. Verifique o requirements.txt.")
+    if HAS_ACERVO:
+        st.caption(f"Acervo local: {len(carregar_acervo_cached())} páginas")
+    st.caption(f"Memória da sessão: ~{memoria_sessao() // 1024} KB • "
+               f"Fontes compartilhadas: {len(fonte_store())} ({fonte_store().bytes // 1024} KB)")
 
 # =========================
 # TEMA / CSS (FUNDO CORRIGIDO)
@@ -265,8 +376,8 @@ SUGESTOES = [
 cols = st.columns(len(SUGESTOES))
 for i, texto in enumerate(SUGESTOES):
     if cols[i].button(texto, use_container_width=True):
-        st.session_state.hist.append(("user", texto, None, None))
-        st.session_state.hist.append(("typing", "digitando...", "pensando", None))
+        hist_append("user", texto)
+        hist_append("typing", "digitando...", "pensando")
         _rerun()
 
 # =========================
@@ -287,6 +398,31 @@ def classify_scope_heuristic(text: str) -> str:
     if any(term in t for term in AMBIGUOUS_TERMS): return "ambiguous"
     return "off"
 
+# =========================
+# ORÇAMENTO DE LATÊNCIA POR TURNO
+# =========================
+try:
+    ORCAMENTO_TURNO_S = float(_get_secret("app", "orcamento_turno", default="20"))
+except ValueError:
+    ORCAMENTO_TURNO_S = 20.0
+RESERVA_LLM_S = 6.0      # tempo guardado para o LLM; busca/leitura só usam o que sobrar
+MIN_BUSCA_S = 1.5        # abaixo disso (além da reserva) a busca é pulada
+MIN_LEITURA_S = 3.0      # abaixo disso (além da reserva) usa só os snippets, sem ler artigos
+SCRAPE_TIMEOUT_S = 8.0
+SCRAPE_CONEXAO_S = 3.0   # timeout de conexão da leitura (o total segue o prazo de SCRAPE_TIMEOUT_S/orçamento)
+MIN_LLM_TIMEOUT_S = 2.0
+MAX_TOKENS_PADRAO = 500
+MAX_TOKENS_REDUZIDO = 220
+
+def novo_prazo() -> Prazo:
+    return Prazo(ORCAMENTO_TURNO_S, RESERVA_LLM_S)
+
+def _pode_buscar(prazo: Prazo) -> bool:
+    if prazo.antes_do_llm() < MIN_BUSCA_S:
+        prazo.degradar("sem_busca")
+        return False
+    return True
+
 # =========================
 # BUSCA WEB (Tavily → DDGS) + SCRAPING (LEITURA)
 # =========================
@@ -304,9 +440,37 @@ def should_search_web(text: str) -> bool:
             return True
     return False
 
-@st.cache_data(ttl=3600, show_spinner=False) # Cache de 1 hora
-def web_search(query: str, max_results: int = 6):
-    """Busca web básica (APENAS snippets), com filtro de data para consultas 'recentes'."""
+class _BuscaVazia(Exception):
+    """Levantada dentro da função cacheada: st.cache_data não guarda exceções, então
+    buscas vazias/falhas não ficam 1 hora no cache (vão para o cache negativo curto)."""
+
+def web_search(query: str, max_results: int = 6, _prazo: Optional[Prazo] = None):
+    """Busca web básica com cache positivo de 1 h e negativo de BUSCA_NEGATIVA_TTL_S."""
+    chave = (query, max_results)
+    negativa = busca_negativa()
+    if negativa.get(chave, 0.0) > time.monotonic():
+        return []
+    try:
+        return _web_search_cached(query, max_results, _prazo=_prazo)
+    except _BuscaVazia:
+        agora = time.monotonic()
+        for k in [k for k, ate in list(negativa.items()) if ate <= agora]:
+            negativa.pop(k, None)
+        negativa[chave] = agora + BUSCA_NEGATIVA_TTL_S
+        return []
+
+@st.cache_data(ttl=3600, show_spinner=False) # Cache de 1 hora (só resultados não vazios)
+def _web_search_cached(query: str, max_results: int = 6, _prazo: Optional[Prazo] = None):
+    hits = _web_search_provedores(query, max_results, _prazo)
+    if not hits:
+        raise _BuscaVazia()
+    return hits
+
+def _web_search_provedores(query: str, max_results: int = 6, _prazo: Optional[Prazo] = None):
+    """Busca web básica (APENAS snippets), com filtro de data para consultas 'recentes'.
+    `_prazo` limita o timeout de cada provedor; provedores com disjuntor aberto são pulados."""
+    dj = disjuntores()
+    timeout = max(1.0, _prazo.antes_do_llm()) if _prazo else None
     
     l_query = query.lower()
     is_news_query = any(tok in l_query for tok in ["notícia", "notícias", "artigo", "artigos", "g1", "reportagem", "matéria"])
@@ -330,7 +494,7 @@ def web_search(query: str, max_results: int = 6):
         q = f"site:senacrs.com.br OR site:senac.br {query}"
     
 
-    if TAVILY_KEY:
+    if TAVILY_KEY and dj["tavily"].permitir():
         try:
             from tavily import TavilyClient
             tv = TavilyClient(api_key=TAVILY_KEY)
@@ -341,18 +505,28 @@ def web_search(query: str, max_results: int = 6):
                 query=q, 
                 max_results=max_results, 
                 search_depth="basic",
-                time_range=tavily_time_range # <--- PARÂMETRO ADICIONADO
+                time_range=tavily_time_range, # <--- PARÂMETRO ADICIONADO
+                **({"timeout": timeout} if timeout else {})
             )
+            dj["tavily"].sucesso()
 
             if isinstance(res, dict) and res.get("results"):
                 return [{"title": r.get("title"), "url": r.get("url"), "content": r.get("content")} for r in res["results"]]
-        except Exception:
-            pass
+        except Exception as e:
+            _falha_provedor(dj["tavily"], e, timeout)
             
     if DDGS is None: return []
+    if _prazo:
+        # O Tavily pode ter consumido o orçamento: recalcula antes do fallback.
+        # ANTES de permitir(): ele pode pôr o disjuntor em meio-aberto, e desistir depois disso o deixaria preso
+        if not _pode_buscar(_prazo):
+            return []
+        timeout = max(1.0, _prazo.antes_do_llm())
+    if not dj["ddgs"].permitir(): return []
+    ddgs_timeout = (int(timeout) or 1) if timeout else None
     try:
         hits = []
-        with DDGS() as ddgs:
+        with (DDGS(timeout=ddgs_timeout) if ddgs_timeout else DDGS()) as ddgs:
             
             # --- INÍCIO DA MUDANÇA (Parte 3) ---
             # Adiciona o parâmetro 'timelimit' à chamada da API
@@ -365,41 +539,66 @@ def web_search(query: str, max_results: int = 6):
 
             for r in ddgs_results:
                 hits.append({"title": r.get("title"), "url": r.get("href") or r.get("url"), "content": r.get("body")})
+        dj["ddgs"].sucesso()
         return hits
-    except Exception:
+    except Exception as e:
+        _falha_provedor(dj["ddgs"], e, ddgs_timeout)
         return []
         
 # *** NOVO: Função helper para "ler" o conteúdo de artigos/notícias ***
 @st.cache_data(ttl=3600, show_spinner=False)
-def scrape_article_text(url: str) -> Optional[str]:
+def _scrape_article_text_cached(url: str, _timeout: float = SCRAPE_TIMEOUT_S) -> str:
+    """Baixa e extrai o texto. Falhas levantam exceção e por isso NÃO entram no cache
+    (um timeout curto por falta de orçamento não fica gravado por 1 hora)."""
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    }
+    limite = time.monotonic() + _timeout
+    # Usamos requests pois o fetch_url nativo do trafilatura pode ser bloqueado.
+    # O timeout do requests vale por leitura, não para o download inteiro: lê em
+    # pedaços e confere o prazo (e o tamanho) a cada um
+    partes, total = [], 0
+    with requests.get(url, headers=headers, timeout=(min(SCRAPE_CONEXAO_S, _timeout), _timeout),
+                      allow_redirects=True, stream=True) as response:
+        response.raise_for_status()
+        for parte in response.iter_content(64 * 1024):
+            partes.append(parte)
+            total += len(parte)
+            if time.monotonic() > limite:
+                raise TimeoutError("Download excedeu o limite de tempo.")
+            if total > extracao.MAX_HTML_BYTES:
+                raise ValueError("Página grande demais para extrair.")
+    
+    # Parsing fora da thread do script (pool de processos), limitado ao tempo que sobrou
+    restante = limite - time.monotonic()
+    main_text = extracao.extrair(b"".join(partes), timeout=max(0.5, min(extracao.TIMEOUT_DOC_S, restante)))
+    if main_text is None:
+        raise TimeoutError("Extração excedeu o limite de tempo/tamanho.")
+    return main_text
+
+def scrape_article_text(url: str, timeout: float = SCRAPE_TIMEOUT_S) -> Optional[str]:
     """Tenta baixar e extrair o texto principal de uma URL usando Trafilatura."""
     if not url or not HAS_SCRAPER:
         return None
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        # Usamos requests pois o fetch_url nativo do trafilatura pode ser bloqueado
-        response = requests.get(url, headers=headers, timeout=8, allow_redirects=True)
-        response.raise_for_status() 
-        
-        main_text = extract(response.content, 
-                            include_comments=False, 
-                            include_tables=False,
-                            no_fallback=True) # Evita pegar o HTML inteiro se falhar
-        
-        return (main_text or "").strip()
+        return _scrape_article_text_cached(url, timeout)
     except Exception as e:
         return None # Falha silenciosa
 
 # *** NOVO: Função principal para buscar E ler artigos ***
-@st.cache_data(ttl=3600, show_spinner=False)
-def search_and_read_articles(query: str, max_results: int = 4):
-    """Busca na web, FILTRA, e depois tenta 'ler' cada resultado."""
+# (Sem cache próprio: web_search e a leitura de cada URL já são cacheadas, e um resultado
+#  degradado por falta de orçamento não deve ficar gravado.)
+def search_and_read_articles(query: str, max_results: int = 4, prazo: Optional[Prazo] = None):
+    """Busca na web, FILTRA, e depois tenta 'ler' cada resultado (se o orçamento do turno permitir)."""
+
+    # 0. Acervo local (já extraído pelo crawler): evita busca + scraping ao vivo
+    locais = crawler.buscar_acervo(carregar_acervo_cached(), query, max_results) if HAS_ACERVO else []
+    if locais:
+        return locais
     
     # 1. Busca básica (links e snippets)
     # Pede 2 resultados a mais para ter uma margem para o filtro
-    basic_results = web_search(query, max_results + 2) 
+    basic_results = web_search(query, max_results + 2, _prazo=prazo) 
     if not basic_results:
         return []
         
@@ -425,7 +624,13 @@ def search_and_read_articles(query: str, max_results: int = 4):
     for r in filtered_results[:max_results]: 
         snippet = r.get("content") or ""
         url = r.get("url")
-        full_content = scrape_article_text(url)
+        # Degradação: sem tempo para ler o artigo, fica o snippet da busca
+        if prazo and prazo.antes_do_llm() < MIN_LEITURA_S:
+            prazo.degradar("so_snippets")
+            full_content = None
+        else:
+            timeout = min(SCRAPE_TIMEOUT_S, prazo.antes_do_llm()) if prazo else SCRAPE_TIMEOUT_S
+            full_content = scrape_article_text(url, timeout)
         
         final_content = full_content if (full_content and len(full_content) > len(snippet) * 1.5) else snippet
         
@@ -483,38 +688,89 @@ def _slugify(text: str, maxlen: int = 48) -> str:
     text = re.sub(r"[^a-zA-Z0-9]+","-", text).strip("-").lower()
     return text[:maxlen] or "resposta"
 
-def _save_json(payload: dict, fontes: Optional[list]) -> Path:
+def _save_json(payload: dict, fontes: Optional[list]) -> Optional[Path]:
+    """Caminho do arquivo gravado em respostas/, ou None se nada foi gravado."""
     ts = datetime.now().strftime("%Y%m%d-%H%M%S")
     slug = _slugify((payload.get("content") or "")[:36])
     data = dict(payload); data["sources"] = fontes or []
-    path = OUTBOX_DIR / f"{ts}_{slug}.json"
-    try:
-        path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
-    except Exception:
-        pass
-    return path
+    texto = json.dumps(data, ensure_ascii=False, indent=2)
+    # Criação exclusiva ("x"): respostas iguais no mesmo segundo (ex.: lote.py) não se sobrescrevem
+    for n in range(1, 100):
+        path = OUTBOX_DIR / (f"{ts}_{slug}.json" if n == 1 else f"{ts}_{slug}-{n}.json")
+        try:
+            with open(path, "x", encoding="utf-8") as f:
+                f.write(texto)
+            return path
+        except FileExistsError:
+            continue
+        except Exception:
+            return None
+    return None
 
-def _last_msgs(limit_pairs: int = 6) -> List[Dict[str,str]]:
+def _last_msgs(limit_pairs: int = 6, bloco: int = HIST_BLOCO) -> List[Dict[str,str]]:
+    """Últimas `limit_pairs*2` mensagens ou até `bloco-1` a mais. O início da janela só avança
+    de `bloco` em `bloco` mensagens: entre esses saltos o histórico enviado só cresce no fim
+    e o prefixo (BASE_SISTEMA + histórico) se repete, aproveitando o cache de prompt do provedor.
+    No turno do salto o prefixo muda uma vez."""
     msgs: List[Dict[str,str]] = []
     temp_hist = [item for item in st.session_state.hist if item[0] in ["user", "bot"]]
-    for who, msg, *_ in temp_hist[-(limit_pairs*2):]:
+    limite = limit_pairs * 2
+    inicio = (len(temp_hist) - limite) // bloco * bloco if len(temp_hist) > limite else 0
+    for who, msg, *_ in temp_hist[inicio:]:
         msgs.append({"role":"user" if who=="user" else "assistant", "content": msg})
     return msgs
 
-def llm_json(messages: List[Dict[str,str]], temperature=0.35, max_tokens=500) -> dict:
+TOKENS_LOG_PATH = OUTBOX_DIR / "tokens.jsonl"
+
+def _registrar_tokens(tipo: str, response, max_tokens: int) -> None:
+    """Uma linha por chamada ao LLM em respostas/tokens.jsonl (resumo: relatorio_tokens.py)."""
+    uso = getattr(response, "usage", None)
+    if uso is None:
+        return
+    detalhes = getattr(uso, "prompt_tokens_details", None)
+    registro = {
+        "ts": datetime.now().isoformat(timespec="seconds"),
+        "tipo": tipo,
+        "modelo": OPENAI_MODEL,
+        "prompt_tokens": getattr(uso, "prompt_tokens", 0) or 0,
+        "completion_tokens": getattr(uso, "completion_tokens", 0) or 0,
+        "cached_tokens": getattr(detalhes, "cached_tokens", 0) or 0,
+        "max_tokens": max_tokens,
+    }
+    try:
+        with open(TOKENS_LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    except Exception:
+        pass
+
+def llm_json(messages: List[Dict[str,str]], temperature=0.35, max_tokens=MAX_TOKENS_PADRAO,
+             prazo: Optional[Prazo] = None, tipo: str = "padrao") -> dict:
+    """`messages` já vem em ordem amiga do cache de prompt: histórico (cresce no fim; o início só avança em blocos) e,
+    depois dele, as partes que mudam a cada turno (contexto, pergunta). `tipo` rotula o log de tokens."""
     if llm_client is None:
         return {"emotion":"neutro","content":"⚠️ Para respostas completas, configure sua chave da OpenAI em secrets.toml."}
     
+    # Prefixo estático: BASE_SISTEMA é sempre a primeira mensagem, idêntica em toda chamada
     full_messages = [{"role":"system","content": BASE_SISTEMA}] + messages
+
+    # O LLM usa o que resta do orçamento; se já está abaixo da reserva, gera uma resposta mais curta.
+    # Sem retentativas do SDK (padrão: 2), que multiplicariam o timeout além do orçamento
+    cliente = llm_client
+    if prazo:
+        if prazo.restante() < RESERVA_LLM_S and max_tokens > MAX_TOKENS_REDUZIDO:
+            max_tokens = MAX_TOKENS_REDUZIDO
+            prazo.degradar("max_tokens_reduzido")
+        cliente = llm_client.with_options(max_retries=0, timeout=max(MIN_LLM_TIMEOUT_S, prazo.restante()))
     
     try:
-        response = llm_client.chat.completions.create(
+        response = cliente.chat.completions.create(
             model=OPENAI_MODEL, 
             messages=full_messages,
             temperature=temperature, 
             max_tokens=max_tokens
         )
         raw_text = (response.choices[0].message.content or "").strip()
+        _registrar_tokens(tipo, response, max_tokens)
     except Exception as e:
         return {"emotion": "triste", "content": f"⚠️ Desculpe, ocorreu um problema técnico ao gerar a resposta: {e}"}
 
@@ -547,12 +803,13 @@ def extract_city(text: str) -> str:
     m = re.search(r"senac\s+([a-zçãõáéíóúâêôà\- ]+)", (text or "").lower(), re.IGNORECASE)
     return m.group(1).strip().title() if m else ""
 
-def responder_endereco(cidade: str) -> list:
+def responder_endereco(cidade: str, prazo: Optional[Prazo] = None) -> list:
     q1 = f"site:senacrs.com.br unidades {cidade}"
     q2 = f"site:senac.br unidades {cidade}"
     # *** MODIFICAÇÃO: Garante que esta função use a busca BÁSICA (rápida) ***
-    fontes = web_search(q1, 6) or [] # web_search é a básica
-    fontes += web_search(q2, 4) or []
+    fontes = web_search(q1, 6, _prazo=prazo) or [] # web_search é a básica
+    if not prazo or prazo.antes_do_llm() >= MIN_BUSCA_S:
+        fontes += web_search(q2, 4, _prazo=prazo) or []
     # *** FIM DA MUDANÇA ***
     out, seen = [], set()
     for f in fontes:
@@ -561,14 +818,51 @@ def responder_endereco(cidade: str) -> list:
         seen.add(url); out.append({"title": (f.get("title") or 'Fonte').strip(), "url": url, "content": f.get("content")})
     return out
 
+# =========================
+# RESPOSTAS PRONTAS (cache quente gerado pelo lote.py)
+# =========================
+RESPOSTAS_PRONTAS_PATH = Path(_get_secret("app", "respostas_prontas", default=str(OUTBOX_DIR / "faq.jsonl")))
+
+@st.cache_resource(ttl=600, max_entries=2, show_spinner=False)
+def carregar_respostas_prontas(path: str, mtime: float = 0.0) -> Dict[str, dict]:
+    """{pergunta normalizada: {"emotion","content","sources"}} a partir do JSONL do lote.py.
+    `mtime` entra na chave do cache: o arquivo regravado é relido na hora. O dict é
+    compartilhado entre sessões (sem cópia por turno): quem usa não deve alterá-lo."""
+    prontas: Dict[str, dict] = {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            for linha in f:
+                try:
+                    r = json.loads(linha)
+                except json.JSONDecodeError:
+                    continue
+                if r.get("question") and r.get("content"):
+                    prontas[normalizar_pergunta(r["question"])] = {
+                        "emotion": r.get("emotion", "feliz"), "content": r["content"], "sources": r.get("sources") or []}
+    except Exception:
+        pass
+    return prontas
+
+def resposta_pronta(pergunta: str) -> Optional[dict]:
+    try:
+        mtime = RESPOSTAS_PRONTAS_PATH.stat().st_mtime
+    except OSError:
+        return None
+    return carregar_respostas_prontas(str(RESPOSTAS_PRONTAS_PATH), mtime).get(normalizar_pergunta(pergunta))
+
 # =========================
 # GERAÇÃO DE RESPOSTA (JSON)
 # =========================
-def gerar_resposta_json(pergunta: str, temperature: float):
+def gerar_resposta_json(pergunta: str, temperature: float, prazo: Optional[Prazo] = None):
+    prazo = prazo or novo_prazo()
     p = (pergunta or "").strip()
     pl = p.lower()
     fontes: list = []
     msgs = _last_msgs()
+    # Mensagens de sistema do turno (escopo, contexto de busca) vão DEPOIS do histórico,
+    # para que BASE_SISTEMA + histórico formem um prefixo estável (cache de prompt do provedor)
+    contexto: List[Dict[str,str]] = []
+    tipo = "padrao"
     
     # --- BLOCO 1: CAPTURA DE CONTATO (LEAD) ---
     if st.session_state.awaiting_contact:
@@ -590,6 +884,12 @@ def gerar_resposta_json(pergunta: str, temperature: float):
         st.session_state.awaiting_contact = True
         return {"emotion": "feliz", "content": "Excelente! Posso te ajudar com o processo. Para agilizar seu atendimento com um consultor do Senac, você me autoriza a registrar seu nome e e-mail?"}, []
 
+    # --- RESPOSTA PRONTA (FAQ pré-calculado pelo lote.py) ---
+    if not st.session_state.awaiting_location:
+        pronta = resposta_pronta(p)
+        if pronta:
+            return {"emotion": pronta["emotion"], "content": pronta["content"]}, list(pronta["sources"])
+
     # --- BLOCO 3: LOCALIZAÇÃO DE UNIDADE (SE NECESSÁRIO) ---
     if any(tok in pl for tok in ["onde fica","endereço","endereco","unidade","unidades","localização","localizacao","perto de mim"]):
         city = extract_city(p)
@@ -598,51 +898,53 @@ def gerar_resposta_json(pergunta: str, temperature: float):
             return {"emotion":"feliz","content":"Para localizar certinho, me diz a **cidade** (e o estado, se for fora do RS). 😉"}, []
         else:
             # Se a cidade já foi dada (ex: "onde fica senac porto alegre"), busca direto
-            if web_toggle:
-                fontes = responder_endereco(city) # Usa a busca BÁSICA
+            tipo = "endereco"
+            if web_toggle and _pode_buscar(prazo):
+                fontes = responder_endereco(city, prazo) # Usa a busca BÁSICA
             # Continua para o Bloco 5 para formatar a resposta...
 
     if st.session_state.awaiting_location and not any(k in pl for k in ["senac","curso","inscri","pagamento","unidade","matrícula","ead"]):
         st.session_state.awaiting_location = False
         city = p.title()
-        if web_toggle:
-            fontes = responder_endereco(city) # Usa a busca BÁSICA
+        if web_toggle and _pode_buscar(prazo):
+            fontes = responder_endereco(city, prazo) # Usa a busca BÁSICA
         
         if fontes:
             ctx = "\n".join([f"[{i+1}] {h['title']} — {h['url']}\n{(h.get('content') or '')[:600]}" for i,h in enumerate(fontes)])
-            msgs.insert(0, {"role":"system","content":"Contexto de pesquisa:\n"+ctx})
-        msgs.append({"role":"user","content": f"O usuário informou a cidade: {city}. Oriente sem inventar e cite links confiáveis se possível."})
-        payload = llm_json(msgs, temperature=temperature)
+            contexto.append({"role":"system","content":"Contexto de pesquisa:\n"+ctx})
+        pedido = {"role":"user","content": f"O usuário informou a cidade: {city}. Oriente sem inventar e cite links confiáveis se possível."}
+        payload = llm_json(msgs + contexto + [pedido], temperature=temperature, prazo=prazo, tipo="endereco")
         return payload, fontes
 
     # --- BLOCO 4: GATILHO DE REDIRECIONAMENTO (FORÇAR FOCO) ---
     scope = classify_scope_heuristic(p)
     
     if scope == "off":
-        msgs.insert(0, {"role":"system",
+        tipo = "fora_escopo" if tipo == "padrao" else tipo
+        contexto.append({"role":"system",
                         "content": f"A pergunta do usuário '{p}' está fora do escopo Senac. Você DEVE usar a sua resposta para gentilmente redirecionar ou conectar o assunto ao contexto de cursos/serviços do Senac. **Exemplo:** 'Vi que você perguntou sobre [Assunto]. O Senac oferece [Curso Relacionado] que pode te ajudar. Fale mais sobre isso!'"
                        })
     elif scope == "ambiguous":
-        msgs.insert(0, {"role":"system",
+        tipo = "ambiguo" if tipo == "padrao" else tipo
+        contexto.append({"role":"system",
                         "content": "A pergunta é geral (carreira, tecnologia, etc.); conecte naturalmente ao contexto do Senac/Conecta Senac/Aprendiz, dando ênfase a cursos relevantes."
                        })
 
     # --- BLOCO 5: BUSCA WEB E RESPOSTA FINAL ---
     # *** MODIFICADO: Chama a função de leitura de artigos ***
     # (Só roda se 'fontes' não foi preenchido pelo Bloco 3)
-    if not fontes and web_toggle and should_search_web(p):
-        fontes = search_and_read_articles(p, 5) # Chama a nova função de LEITURA
+    if not fontes and web_toggle and should_search_web(p) and _pode_buscar(prazo):
+        fontes = search_and_read_articles(p, 5, prazo) # Chama a nova função de LEITURA
     # *** FIM DA MUDANÇA ***
 
     if fontes:
         # *** MODIFICADO: Trunca o conteúdo (que pode ser longo) antes de enviar ao LLM ***
         ctx = "\n".join([f"[{i+1}] {h['title']} — {h['url']}\n{(h.get('content') or '')[:1500]}" for i,h in enumerate(fontes)])
         # *** FIM DA MUDANÇA ***
-        msgs.insert(0, {"role":"system","content":"Contexto de pesquisa:\n"+ctx})
+        contexto.append({"role":"system","content":"Contexto de pesquisa:\n"+ctx})
+        tipo = "endereco" if tipo == "endereco" else "busca"
         
-    msgs.append({"role":"user","content": p})
-
-    payload = llm_json(msgs, temperature=temperature)
+    payload = llm_json(msgs + contexto + [{"role":"user","content": p}], temperature=temperature, prazo=prazo, tipo=tipo)
     return payload, fontes
 
 # =========================
@@ -650,7 +952,7 @@ def gerar_resposta_json(pergunta: str, temperature: float):
 # =========================
 st.markdown("<div id='chat' class='chat-box'>", unsafe_allow_html=True)
 
-for who, msg, emo, fontes in st.session_state.hist:
+for who, msg, emo, chaves in st.session_state.hist:
     if who == "user":
         st.markdown(
             "<div class='bubble-row' style='justify-content:flex-end;'>"
@@ -668,7 +970,8 @@ for who, msg, emo, fontes in st.session_state.hist:
             unsafe_allow_html=True
         )
     else:
-        emotion = emo if emo and emo in st.session_state.avatars else 'feliz'
+        emotion = emo if emo and emo in AVATARS else 'feliz'
+        fontes = fonte_store().obter(chaves)
         st.markdown(
             "<div class='bubble-row' style='justify-content:flex-start;'>"
             f"<div class='avatar-shell'>{avatar_img(emotion)}</div>"
@@ -728,7 +1031,8 @@ if st.session_state.hist and st.session_state.hist[-1][0] == "typing":
             pergunta = msg
             break
             
-    payload, fontes = gerar_resposta_json(pergunta, st.session_state.get("temperature", 0.35))
+    prazo = novo_prazo()
+    payload, fontes = gerar_resposta_json(pergunta, st.session_state.get("temperature", 0.35), prazo)
     
     final_content = (payload.get("content") or "Desculpe, não consegui processar a resposta.").strip()
     emotion = payload.get("emotion", "feliz")
@@ -737,11 +1041,13 @@ if st.session_state.hist and st.session_state.hist[-1][0] == "typing":
     final_emotion = emotion if emotion in valid_emotions else "feliz"
     
     try:
-        _ = _save_json({"emotion": final_emotion, "content": final_content}, fontes)
+        path = _save_json({"emotion": final_emotion, "content": final_content, "turno": prazo.resumo()}, fontes)
+        st.session_state.ultima_resposta_path = str(path) if path else None # usado pelo lote.py
     except Exception:
         pass
         
-    st.session_state.hist[-1] = ("bot", final_content or "Posso te ajudar com algo do Senac? 🙂", final_emotion, fontes)
+    st.session_state.hist[-1] = Msg("bot", (final_content or "Posso te ajudar com algo do Senac? 🙂")[:MAX_MSG_CHARS],
+                                    final_emotion, fonte_store().guardar(fontes))
     
     if st.session_state.tts_enabled and final_content:
         text_to_speech_component(final_content)
@@ -791,7 +1097,7 @@ if st.session_state.stt_enabled and HAS_STT:
                         mic_txt = transcricao_obj.text
                         
                         # Adiciona a transcrição como mensagem do usuário no histórico
-                        st.session_state.hist.append(("user", mic_txt, None, None))
+                        hist_append("user", mic_txt)
                         
             except Exception as e:
                 # Log de erro caso a transcrição falhe
@@ -819,18 +1125,18 @@ if mic_txt and mic_txt.strip():
     msg = mic_txt.strip()
 elif user_msg and user_msg.strip():
     msg = user_msg.strip()
-    st.session_state.hist.append(("user", msg, None, None))
+    hist_append("user", msg)
 
 
 if msg:
-    st.session_state.hist.append(("typing", "digitando...", "pensando", None))
+    hist_append("typing", "digitando...", "pensando")
     _rerun()
 
 # =========================
 # RODAPÉ - LIMPO
 # =========================
 if st.button("🧹 Limpar conversa", use_container_width=True, key="clear_chat_bottom"):
-    st.session_state.hist = [("bot", "Conversa limpa! Quer falar sobre cursos, inscrição, EAD, unidades ou conhecer melhor o Aprendiz? 🙂", "feliz", None)]
+    st.session_state.hist = [Msg("bot", "Conversa limpa! Quer falar sobre cursos, inscrição, EAD, unidades ou conhecer melhor o Aprendiz? 🙂", "feliz")]
     st.session_state.awaiting_location = False
     st.session_state.awaiting_contact = False
     _rerun()
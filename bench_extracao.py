@@ -0,0 +1,107 @@
+# bench_extracao.py — Conecta Senac • Aprendiz
+# Benchmark: latência das OUTRAS sessões enquanto algumas sessões leem artigos
+# ----------------------------------------------------------------------
+# Simula K sessões extraindo artigos grandes em loop e mede, ao mesmo tempo,
+# a latência de um "turno leve" de outra sessão (montagem de prompt + regex,
+# pouca CPU). Compara extração inline (na thread) × pool de processos.
+#
+# Uso:
+#   python bench_extracao.py                 # K = 4 sessões lendo, 10 s por modo
+#   python bench_extracao.py --leitoras 8 --duracao 20
+# ----------------------------------------------------------------------
+
+import re
+import sys
+import json
+import time
+import argparse
+import threading
+from typing import List, Optional
+
+import extracao
+
+def html_sintetico(paragrafos: int = 2500) -> bytes:
+    """Artigo grande (~600 KB) com ruído de navegação, parecido com um portal de notícias."""
+    nav = "".join(f"<li><a href='/menu/{i}'>Menu {i}</a></li>" for i in range(200))
+    corpo = "".join(
+        f"<p>Parágrafo {i}: o Senac RS oferece cursos de tecnologia, gestão, gastronomia e idiomas "
+        f"em diversas unidades do estado, com turmas presenciais e EAD. <b>Inscrições abertas</b> "
+        f"até o fim do mês, com bolsas e descontos para estudantes.</p>" for i in range(paragrafos)
+    )
+    return (f"<html><head><title>Senac RS</title></head><body><nav><ul>{nav}</ul></nav>"
+            f"<article><h1>Notícia</h1>{corpo}</article><footer>{nav}</footer></body></html>").encode("utf-8")
+
+def turno_leve() -> None:
+    """Trabalho típico de um turno sem leitura: montar mensagens, serializar e aplicar regex."""
+    msgs = [{"role": "user" if i % 2 else "assistant", "content": f"mensagem {i} sobre cursos do senac " * 8} for i in range(12)]
+    bruto = json.dumps(msgs, ensure_ascii=False)
+    re.findall(r"senac\s+([a-z]+)", bruto)
+    json.loads(bruto)
+
+def _percentil(valores: List[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    v = sorted(valores)
+    return v[min(len(v) - 1, int(round((len(v) - 1) * p / 100)))]
+
+def medir(modo: str, leitoras: int, duracao: float, html: bytes) -> dict:
+    parar = threading.Event()
+    extraidos = [0]
+    lock = threading.Lock()
+
+    def leitora():
+        while not parar.is_set():
+            if modo == "inline":
+                extracao.extrair_texto(html)
+            else:
+                extracao.extrair(html, timeout=60)
+            with lock:
+                extraidos[0] += 1
+
+    threads = [threading.Thread(target=leitora, daemon=True) for _ in range(leitoras)]
+    for t in threads:
+        t.start()
+
+    latencias = []
+    fim = time.perf_counter() + duracao
+    while time.perf_counter() < fim:
+        # Mede a partir do instante em que o turno DEVERIA começar: inclui a espera
+        # pelo GIL ao acordar, que é onde a extração inline atrapalha as outras sessões
+        agendado = time.perf_counter() + 0.01
+        time.sleep(0.01)  # intervalo entre "turnos" da sessão leve
+        turno_leve()
+        latencias.append((time.perf_counter() - agendado) * 1000)
+
+    parar.set()
+    for t in threads:
+        t.join()
+    return {
+        "modo": modo,
+        "leitoras": leitoras,
+        "turnos_leves": len(latencias),
+        "p50_ms": round(_percentil(latencias, 50), 2),
+        "p95_ms": round(_percentil(latencias, 95), 2),
+        "p99_ms": round(_percentil(latencias, 99), 2),
+        "artigos_s": round(extraidos[0] / duracao, 2),
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark da extração inline × pool de processos.")
+    ap.add_argument("--leitoras", type=int, default=4, help="sessões lendo artigos ao mesmo tempo")
+    ap.add_argument("--duracao", type=float, default=10, help="segundos por modo")
+    ap.add_argument("--paragrafos", type=int, default=2500, help="tamanho do artigo sintético")
+    args = ap.parse_args(argv)
+
+    html = html_sintetico(args.paragrafos)
+    print(f"artigo: {len(html) // 1024} KB • workers do pool: {extracao.WORKERS}")
+    extracao.extrair(html, timeout=60)  # aquece o pool (spawn + import do trafilatura)
+
+    base = medir("inline", 0, min(3.0, args.duracao), html)
+    print(f"{'modo':>8} {'leitoras':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'artigos/s':>10}")
+    for r in (base, medir("inline", args.leitoras, args.duracao, html), medir("pool", args.leitoras, args.duracao, html)):
+        print(f"{r['modo']:>8} {r['leitoras']:>9} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} {r['artigos_s']:>10}")
+    extracao._pool.encerrar()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,465 @@
+# crawler.py — Conecta Senac • Aprendiz
+# Crawler incremental de notícias do Senac RS
+# ----------------------------------------------------------------------
+# Percorre sitemaps/listagens do senacrs.com.br, detecta mudanças por
+# ETag/Last-Modified e hash do conteúdo, e guarda o texto já extraído em
+# ACERVO_DIR. O app consulta esse acervo antes de buscar/ler na web.
+#
+# Uso:
+#   python crawler.py                        # uma passada
+#   python crawler.py --loop 3600            # passadas a cada hora
+#   python crawler.py --espelho fixtures/    # lê de um espelho local de HTML
+#
+# A passada é retomável: a fila de pendentes é salva em disco a cada página.
+# ----------------------------------------------------------------------
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+import unicodedata
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import List, Optional, Dict, Tuple
+from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+
+try:
+    import requests
+except Exception:
+    requests = None
+
+try:
+    import extracao
+except Exception:
+    extracao = None
+
+# =========================
+# CONFIG
+# =========================
+ACERVO_DIR = Path("acervo")
+PAGINAS_DIR = ACERVO_DIR / "paginas"
+ESTADO_PATH = ACERVO_DIR / "estado.json"
+
+SITE = "https://www.senacrs.com.br"
+SITEMAPS = [f"{SITE}/sitemap.xml"]
+LISTAGENS = [f"{SITE}/noticias"]
+# Só notícias do próprio site: é o que buscar_acervo serve (páginas de curso seguem na busca ao vivo)
+FILTRO_URL = re.compile(r"^https?://(www\.)?senacrs\.com\.br/noticias?/", re.IGNORECASE)
+
+USER_AGENT = "ConectaSenacAprendizBot/1.0 (+https://www.senacrs.com.br)"
+ATRASO_PADRAO = 2.0          # segundos entre requisições (educado com o servidor)
+TIMEOUT_HTTP = 10
+REVISITA_SEG = 24 * 3600     # revisita páginas sem lastmod no sitemap a cada 24h
+MAX_PAGINAS_PASSADA = 500
+ACERVO_MAX_IDADE_SEG = 7 * 24 * 3600  # páginas mais antigas que isso não são servidas
+TRAVA_VENCIDA_SEG = 3600     # trava de outro processo sem atualização há mais que isso é abandonada
+
+# =========================
+# HELPERS
+# =========================
+def ensure_dir(p: Path) -> None:
+    try:
+        p.mkdir(exist_ok=True, parents=True)
+    except Exception:
+        pass
+
+def _agora() -> float:
+    return time.time()
+
+def _url_id(url: str) -> str:
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+def _hash_texto(texto: str) -> str:
+    return hashlib.sha256((texto or "").encode("utf-8")).hexdigest()
+
+def _normalizar(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode("ascii")
+    return text.lower()
+
+def _ler_json(path: Path, default):
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        return default
+
+def _gravar_json(path: Path, data) -> None:
+    # Grava em arquivo temporário e renomeia: uma interrupção não corrompe o estado
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+# =========================
+# BUSCADORES (HTTP / ESPELHO LOCAL)
+# =========================
+class BuscadorHTTP:
+    """Baixa URLs via requests, respeitando robots.txt e um intervalo mínimo entre requisições."""
+
+    def __init__(self, atraso: float = ATRASO_PADRAO):
+        self.atraso = atraso
+        self._ultimo = 0.0
+        self._robots: Dict[str, Optional[RobotFileParser]] = {}
+
+    def _permitido(self, url: str) -> bool:
+        host = urlparse(url).netloc
+        if host not in self._robots:
+            rp = RobotFileParser()
+            try:
+                self._esperar()
+                r = requests.get(f"{urlparse(url).scheme}://{host}/robots.txt",
+                                 headers={"User-Agent": USER_AGENT}, timeout=TIMEOUT_HTTP)
+                rp.parse(r.text.splitlines() if r.ok else [])
+            except Exception:
+                rp = None
+            self._robots[host] = rp
+        rp = self._robots[host]
+        return rp.can_fetch(USER_AGENT, url) if rp else True
+
+    def _esperar(self) -> None:
+        falta = self.atraso - (_agora() - self._ultimo)
+        if falta > 0:
+            time.sleep(falta)
+        self._ultimo = _agora()
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        if requests is None:
+            raise RuntimeError("Lib 'requests' não encontrada.")
+        if not self._permitido(url):
+            return 403, {}, b""
+        self._esperar()
+        h = {"User-Agent": USER_AGENT}
+        h.update(headers or {})
+        r = requests.get(url, headers=h, timeout=TIMEOUT_HTTP, allow_redirects=True)
+        return r.status_code, dict(r.headers), r.content
+
+class BuscadorEspelho:
+    """Serve URLs a partir de um diretório local (<espelho>/<host>/<caminho>), para testes.
+
+    Last-Modified vem do mtime do arquivo, então If-Modified-Since devolve 304 como um servidor real.
+    """
+
+    def __init__(self, raiz: str, atraso: float = 0.0):
+        self.raiz = Path(raiz)
+        self.atraso = atraso
+
+    def _arquivo(self, url: str) -> Optional[Path]:
+        u = urlparse(url)
+        caminho = u.path.strip("/")
+        base = self.raiz / u.netloc / caminho if caminho else self.raiz / u.netloc
+        for cand in (base, base / "index.html", base.with_name(base.name + ".html"), base.with_name(base.name + ".xml")):
+            if cand.is_file():
+                return cand
+        return None
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        if self.atraso:
+            time.sleep(self.atraso)
+        arq = self._arquivo(url)
+        if arq is None:
+            return 404, {}, b""
+        mtime = int(arq.stat().st_mtime)
+        ims = (headers or {}).get("If-Modified-Since")
+        if ims:
+            try:
+                if mtime <= parsedate_to_datetime(ims).timestamp():
+                    return 304, {}, b""
+            except Exception:
+                pass
+        return 200, {"Last-Modified": formatdate(mtime, usegmt=True)}, arq.read_bytes()
+
+# =========================
+# DESCOBERTA (SITEMAPS + LISTAGENS)
+# =========================
+def _tag(el) -> str:
+    return el.tag.rsplit("}", 1)[-1]
+
+def ler_sitemap(buscador, url: str, _profundidade: int = 0) -> Dict[str, Optional[str]]:
+    """Retorna {url: lastmod} de um sitemap (segue sitemapindex recursivamente)."""
+    out: Dict[str, Optional[str]] = {}
+    try:
+        status, _, corpo = buscador.get(url)
+        if status != 200 or not corpo:
+            return out
+        raiz = ET.fromstring(corpo)
+    except Exception:
+        return out
+    for item in raiz:
+        loc = lastmod = None
+        for filho in item:
+            if _tag(filho) == "loc":
+                loc = (filho.text or "").strip()
+            elif _tag(filho) == "lastmod":
+                lastmod = (filho.text or "").strip()
+        if not loc:
+            continue
+        if _tag(raiz) == "sitemapindex":
+            if _profundidade < 3:
+                out.update(ler_sitemap(buscador, loc, _profundidade + 1))
+        elif FILTRO_URL.match(loc):
+            out[loc] = lastmod
+    return out
+
+def ler_listagem(buscador, url: str) -> Dict[str, Optional[str]]:
+    """Extrai links de notícias de uma página de listagem (sem lastmod)."""
+    out: Dict[str, Optional[str]] = {}
+    try:
+        status, _, corpo = buscador.get(url)
+        if status != 200:
+            return out
+        html = corpo.decode("utf-8", "ignore")
+    except Exception:
+        return out
+    for href in re.findall(r"""href=["']([^"'#]+)["']""", html):
+        abs_url = urljoin(url, href)
+        if FILTRO_URL.match(abs_url) and abs_url.rstrip("/") != url.rstrip("/"):
+            out.setdefault(abs_url, None)
+    return out
+
+# =========================
+# PASSADA INCREMENTAL
+# =========================
+def _carregar_estado() -> dict:
+    estado = _ler_json(ESTADO_PATH, {})
+    estado.setdefault("pendentes", [])
+    estado.setdefault("paginas", {})
+    return estado
+
+def _precisa_visitar(meta: Optional[dict], lastmod: Optional[str]) -> bool:
+    if not meta:
+        return True
+    if lastmod and lastmod != meta.get("sitemap_lastmod"):
+        return True
+    return _agora() - meta.get("visitada_em", 0) > REVISITA_SEG
+
+def _titulo(html: str) -> str:
+    m = re.search(r"<title[^>]*>(.*?)</title>", html, re.IGNORECASE | re.DOTALL)
+    return re.sub(r"\s+", " ", m.group(1)).strip() if m else ""
+
+def _visitar(buscador, url: str, lastmod: Optional[str], meta: Optional[dict]) -> Tuple[Optional[dict], str]:
+    """Baixa (condicionalmente) e extrai uma página. Retorna (meta atualizada, situação);
+    meta None = página removida do site (404/410), sai do acervo."""
+    meta = dict(meta or {})
+    headers = {}
+    # GET condicional só para páginas que já estão no acervo; sem hash (ex.: extração falhou)
+    # um 304 deixaria a página de fora para sempre
+    if meta.get("hash"):
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    status, resp_headers, corpo = buscador.get(url, headers)
+    if status in (404, 410):
+        return None, "removida"
+    if status not in (200, 304) or (status == 200 and not corpo):
+        # Sem atualizar visitada_em: a página envelhece (sai do acervo) e é tentada de novo
+        return meta, f"erro {status}"
+    meta["visitada_em"] = _agora()
+    meta["sitemap_lastmod"] = lastmod
+    if status == 304:
+        return meta, "nao modificada"
+
+    html = corpo.decode("utf-8", "ignore")
+    texto = (extracao.extrair(corpo) or "") if extracao is not None else ""
+    if not texto:
+        return meta, "sem texto"
+
+    # Validadores (ETag/Last-Modified) e hash só entram no meta depois que o texto
+    # está extraído e gravado: senão o próximo 304 esconderia uma página que nunca foi salva
+    validadores = {"etag": resp_headers.get("ETag") or resp_headers.get("etag"),
+                   "last_modified": resp_headers.get("Last-Modified") or resp_headers.get("last-modified")}
+
+    h = _hash_texto(texto)
+    if h == meta.get("hash"):
+        meta.update(validadores)
+        return meta, "inalterada"
+
+    pagina = {
+        "url": url,
+        "title": _titulo(html) or url,
+        "content": texto,
+        "lastmod": lastmod or validadores["last_modified"],
+        "atualizada_em": datetime.now(timezone.utc).isoformat(),
+    }
+    _gravar_json(PAGINAS_DIR / f"{_url_id(url)}.json", pagina)
+    meta.update(validadores, hash=h)
+    return meta, "atualizada"
+
+def _trava_path() -> Path:
+    return ESTADO_PATH.with_name(".trava")
+
+def _adquirir_trava() -> bool:
+    """Uma passada por vez sobre o mesmo acervo (vários processos do app, CLI + app...)."""
+    trava = _trava_path()
+    for _ in range(2):
+        try:
+            fd = os.open(trava, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if _agora() - trava.stat().st_mtime < TRAVA_VENCIDA_SEG:
+                    return False
+                trava.unlink()  # dono morreu sem liberar
+            except FileNotFoundError:
+                pass
+            continue
+        with os.fdopen(fd, "w") as f:
+            f.write(str(os.getpid()))
+        return True
+    return False
+
+def _renovar_trava() -> None:
+    try:
+        os.utime(_trava_path())
+    except OSError:
+        pass
+
+def _liberar_trava() -> None:
+    try:
+        _trava_path().unlink()
+    except FileNotFoundError:
+        pass
+
+def executar_passada(buscador, sitemaps: Optional[List[str]] = None,
+                     listagens: Optional[List[str]] = None,
+                     max_paginas: int = MAX_PAGINAS_PASSADA,
+                     parar: Optional[threading.Event] = None,
+                     log=print) -> Dict[str, int]:
+    """Uma passada do crawler. Retoma a fila pendente se a anterior foi interrompida.
+    Se outro processo já está numa passada sobre o mesmo acervo, não faz nada."""
+    ensure_dir(PAGINAS_DIR)
+    if not _adquirir_trava():
+        log("[crawler] outra passada em andamento neste acervo; pulando")
+        return {}
+    try:
+        return _passada(buscador, sitemaps, listagens, max_paginas, parar, log)
+    finally:
+        _liberar_trava()
+
+def _passada(buscador, sitemaps, listagens, max_paginas, parar, log) -> Dict[str, int]:
+    estado = _carregar_estado()
+
+    if not estado["pendentes"]:
+        descobertas: Dict[str, Optional[str]] = {}
+        for sm in (SITEMAPS if sitemaps is None else sitemaps):
+            descobertas.update(ler_sitemap(buscador, sm))
+        for lst in (LISTAGENS if listagens is None else listagens):
+            for u, lm in ler_listagem(buscador, lst).items():
+                descobertas.setdefault(u, lm)
+        estado["pendentes"] = [[u, lm] for u, lm in descobertas.items()
+                               if _precisa_visitar(estado["paginas"].get(u), lm)][:max_paginas]
+        _gravar_json(ESTADO_PATH, estado)
+        log(f"[crawler] {len(descobertas)} URLs descobertas, {len(estado['pendentes'])} para visitar")
+    else:
+        log(f"[crawler] retomando passada: {len(estado['pendentes'])} pendentes")
+
+    contagem: Dict[str, int] = {}
+    while estado["pendentes"]:
+        if parar is not None and parar.is_set():
+            break
+        url, lastmod = estado["pendentes"][0]
+        try:
+            meta, situacao = _visitar(buscador, url, lastmod, estado["paginas"].get(url))
+            if meta is None:
+                estado["paginas"].pop(url, None)
+                (PAGINAS_DIR / f"{_url_id(url)}.json").unlink(missing_ok=True)
+            else:
+                estado["paginas"][url] = meta
+        except Exception as e:
+            situacao = "erro"
+            log(f"[crawler] falha em {url}: {e}")
+        contagem[situacao] = contagem.get(situacao, 0) + 1
+        estado["pendentes"].pop(0)
+        _gravar_json(ESTADO_PATH, estado)
+        _renovar_trava()
+
+    log(f"[crawler] fim da passada: {contagem}")
+    return contagem
+
+def executar_continuamente(buscador, intervalo: float, parar: Optional[threading.Event] = None,
+                           max_paginas: int = MAX_PAGINAS_PASSADA, log=print) -> None:
+    """Roda passadas a cada `intervalo` segundos até `parar` ser sinalizado."""
+    parar = parar or threading.Event()
+    while not parar.is_set():
+        try:
+            executar_passada(buscador, max_paginas=max_paginas, parar=parar, log=log)
+        except Exception as e:
+            log(f"[crawler] passada abortada: {e}")
+        parar.wait(intervalo)
+
+# =========================
+# CONSULTA AO ACERVO (usada pelo app)
+# =========================
+STOPWORDS = {"senac", "senacrs", "noticia", "noticias", "artigo", "artigos", "reportagem", "reportagens",
+             "materia", "materias", "sobre", "quais", "qual", "como", "para", "mais", "recente", "recentes",
+             "ultima", "ultimas", "ultimo", "ultimos", "pesquise", "pesquisa", "procure", "busque", "buscar",
+             "procurar", "quero", "saber", "esta", "este", "hoje", "agora", "semana", "tem", "existe", "existem",
+             "curso", "cursos", "unidade", "unidades", "onde", "fica", "horario", "horarios", "aula", "aulas",
+             "inscricao", "inscricoes", "matricula", "valor", "preco", "data", "quando", "link", "site"}
+INTENCAO_NOTICIA = re.compile(r"\b(noticias?|artigos?|reportage(m|ns)|materias?)\b")
+
+def eh_pergunta_de_noticia(query: str) -> bool:
+    return bool(INTENCAO_NOTICIA.search(_normalizar(query)))
+
+def carregar_acervo(max_idade: float = ACERVO_MAX_IDADE_SEG) -> List[dict]:
+    """Lê as páginas do acervo visitadas há menos de `max_idade` segundos."""
+    estado = _ler_json(ESTADO_PATH, {})
+    paginas_meta = estado.get("paginas", {})
+    limite = _agora() - max_idade
+    docs = []
+    for url, meta in paginas_meta.items():
+        if meta.get("visitada_em", 0) < limite or not meta.get("hash"):
+            continue
+        doc = _ler_json(PAGINAS_DIR / f"{_url_id(url)}.json", None)
+        if doc and doc.get("content"):
+            docs.append(doc)
+    docs.sort(key=lambda d: d.get("lastmod") or d.get("atualizada_em") or "", reverse=True)
+    return docs
+
+def buscar_acervo(docs: List[dict], query: str, max_results: int = 4) -> List[dict]:
+    """Só atende perguntas de NOTÍCIAS, e só com notícias em que TODOS os termos distintivos
+    da pergunta aparecem; pergunta genérica ("notícias do senac") → mais recentes.
+    Qualquer outra pergunta devolve [] e segue para a busca ao vivo."""
+    if not eh_pergunta_de_noticia(query):
+        return []
+    noticias = [d for d in docs if "/noticia" in d["url"]]
+    termos = [t for t in re.findall(r"[a-z0-9]{4,}", _normalizar(query)) if t not in STOPWORDS]
+    if not termos:
+        return [{"title": d["title"], "url": d["url"], "content": d["content"]} for d in noticias[:max_results]]
+    pontuados = []
+    for d in noticias:
+        titulo, corpo = _normalizar(d["title"]), _normalizar(d["content"])
+        if all(t in titulo or t in corpo for t in termos):
+            pontos = sum(3 for t in termos if t in titulo) + sum(corpo.count(t) for t in termos)
+            pontuados.append((pontos, d))
+    pontuados.sort(key=lambda x: x[0], reverse=True)
+    return [{"title": d["title"], "url": d["url"], "content": d["content"]} for _, d in pontuados[:max_results]]
+
+# =========================
+# CLI
+# =========================
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Crawler incremental do acervo Senac RS.")
+    ap.add_argument("--espelho", help="diretório com espelho local de HTML (<dir>/<host>/<caminho>)")
+    ap.add_argument("--atraso", type=float, default=ATRASO_PADRAO, help="segundos entre requisições")
+    ap.add_argument("--loop", type=float, default=0, help="repete a passada a cada N segundos")
+    ap.add_argument("--max-paginas", type=int, default=MAX_PAGINAS_PASSADA)
+    args = ap.parse_args(argv)
+
+    if args.espelho:
+        buscador = BuscadorEspelho(args.espelho, args.atraso if args.atraso != ATRASO_PADRAO else 0.0)
+    else:
+        buscador = BuscadorHTTP(args.atraso)
+    if args.loop:
+        executar_continuamente(buscador, args.loop, max_paginas=args.max_paginas)
+    else:
+        executar_passada(buscador, max_paginas=args.max_paginas)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
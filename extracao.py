@@ -0,0 +1,144 @@
+# extracao.py — Conecta Senac • Aprendiz
+# Extração de texto (Trafilatura) fora das threads de requisição
+# ----------------------------------------------------------------------
+# `extract()` é parsing de HTML puro, preso à CPU e ao GIL: rodando na thread
+# do script, uma sessão lendo artigos grandes atrasa todas as outras.
+# Aqui a extração vai para um pool de PROCESSOS limitado, com:
+#   - guarda de tamanho (HTML acima de MAX_HTML_BYTES nem é processado);
+#   - limite de tempo por documento (TIMEOUT_DOC_S): um filho preso além
+#     disso é morto e o pool é recriado, para não ocupar o worker para sempre;
+#   - atalho inline para páginas pequenas (mais barato que o IPC).
+#
+# Fica num módulo próprio porque os processos filhos precisam importá-lo
+# (o app.py é re-executado pelo Streamlit e não é importável por nome).
+# ----------------------------------------------------------------------
+
+import os
+import time
+import atexit
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+try:
+    from trafilatura import extract
+except Exception:
+    extract = None
+
+# =========================
+# CONFIG
+# =========================
+MAX_HTML_BYTES = 3 * 1024 * 1024    # guarda de tamanho
+INLINE_MAX_BYTES = 48 * 1024        # até aqui extrai na própria thread
+TIMEOUT_DOC_S = 5.0                 # limite por documento (inclui espera na fila)
+WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+MAX_PENDENTES = WORKERS * 4         # fila limitada: acima disso desiste em vez de acumular
+
+# =========================
+# EXTRAÇÃO
+# =========================
+def extrair_texto(html: bytes) -> str:
+    """Extração propriamente dita (roda no processo filho ou inline)."""
+    if extract is None:
+        return ""
+    return (extract(html,
+                    include_comments=False,
+                    include_tables=False,
+                    no_fallback=True) or "").strip() # Evita pegar o HTML inteiro se falhar
+
+class ExtratorPool:
+    """Pool de processos com fila limitada; recriado se um filho morrer ou travar.
+    A vaga na fila só é devolvida quando a tarefa termina de fato (não quando o chamador desiste)."""
+
+    def __init__(self, workers: int = WORKERS, max_pendentes: int = MAX_PENDENTES):
+        self.workers = workers
+        self._vagas = threading.BoundedSemaphore(max_pendentes)
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # 'spawn': fork de um servidor com várias threads (Streamlit) não é seguro
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def _descartar(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def _reciclar(self, pool: ProcessPoolExecutor) -> None:
+        """Mata os filhos de `pool` e, se ainda for o pool atual, faz o próximo pedido criar outro.
+        As tarefas que estavam nele falham com BrokenProcessPool (e devolvem suas vagas)."""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        if hasattr(pool, "terminate_workers"):  # Python 3.14+
+            pool.terminate_workers()
+            return
+        for proc in list((getattr(pool, "_processes", None) or {}).values()):
+            proc.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _vigiar(self, pool: ProcessPoolExecutor, futuro, enviado_em: float) -> None:
+        """Recicla o pool se a tarefa passar de TIMEOUT_DOC_S desde o envio."""
+        def verificar():
+            if not futuro.done():
+                self._reciclar(pool)
+        falta = TIMEOUT_DOC_S - (time.monotonic() - enviado_em)
+        if falta <= 0:
+            verificar()
+            return
+        t = threading.Timer(falta, verificar)
+        t.daemon = True
+        t.start()
+
+    def extrair(self, html: bytes, timeout: float = TIMEOUT_DOC_S) -> Optional[str]:
+        """Texto extraído, "" se não houver texto, ou None (fila cheia / tempo esgotado).
+        `timeout` é o total: espera por vaga na fila + extração."""
+        limite = time.monotonic() + timeout
+        if not self._vagas.acquire(timeout=timeout):
+            return None
+        pool = None
+        try:
+            pool = self._executor()
+            enviado_em = time.monotonic()
+            futuro = pool.submit(extrair_texto, html)
+        except Exception:
+            self._vagas.release()
+            if pool is not None:
+                self._reciclar(pool)
+            return None
+        futuro.add_done_callback(lambda _f: self._vagas.release())
+        try:
+            return futuro.result(timeout=max(0.0, limite - time.monotonic()))
+        except FuturesTimeout:
+            # Ainda na fila: cancela. Já rodando: o resultado é ignorado, mas o filho
+            # só pode continuar até TIMEOUT_DOC_S; depois disso o pool é reciclado
+            if not futuro.cancel():
+                self._vigiar(pool, futuro, enviado_em)
+            return None
+        except BrokenProcessPool:
+            self._reciclar(pool)
+            return None
+
+    def encerrar(self) -> None:
+        self._descartar()
+
+_pool = ExtratorPool()
+atexit.register(_pool.encerrar)
+
+def extrair(html: Optional[bytes], timeout: float = TIMEOUT_DOC_S) -> Optional[str]:
+    """Ponto de entrada: aplica a guarda de tamanho e escolhe inline × pool."""
+    if not html or extract is None:
+        return ""
+    if len(html) > MAX_HTML_BYTES:
+        return None
+    if len(html) <= INLINE_MAX_BYTES:
+        return extrair_texto(html)
+    return _pool.extrair(html, timeout)
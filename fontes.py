@@ -0,0 +1,53 @@
+# fontes.py — Conecta Senac • Aprendiz
+# Repositório de fontes compartilhado entre as sessões do processo
+# ----------------------------------------------------------------------
+# O histórico de cada sessão guarda só as chaves das fontes (ver Msg no
+# app.py); o conteúdo (inclusive texto de artigos) fica aqui uma vez só.
+# Classe pura (sem Streamlit), testada em tests/test_fontes.py.
+# ----------------------------------------------------------------------
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+class FonteStore:
+    """Fontes (inclusive texto de artigos) compartilhadas entre sessões: deduplicadas por hash e
+    despejadas em ordem LRU quando passam de `max_bytes`."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._itens: "OrderedDict[str, Tuple[dict, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _chave(f: dict) -> str:
+        bruto = f"{f.get('url') or ''}\x00{f.get('content') or ''}"
+        return hashlib.sha1(bruto.encode("utf-8")).hexdigest()
+
+    def guardar(self, fontes: Optional[list]) -> Tuple[str, ...]:
+        chaves = []
+        with self._lock:
+            for f in fontes or []:
+                k = self._chave(f)
+                if k in self._itens:
+                    self._itens.move_to_end(k)
+                else:
+                    item = {"title": f.get("title"), "url": f.get("url"), "content": f.get("content")}
+                    tamanho = sum(len(v or "") for v in item.values())
+                    self._itens[k] = (item, tamanho)
+                    self.bytes += tamanho
+                chaves.append(k)
+            while self.bytes > self.max_bytes and len(self._itens) > 1:
+                _, (_, tamanho) = self._itens.popitem(last=False)
+                self.bytes -= tamanho
+        return tuple(chaves)
+
+    def obter(self, chaves) -> list:
+        """Fontes ainda presentes (as despejadas simplesmente somem da lista)."""
+        with self._lock:
+            return [self._itens[k][0] for k in chaves or () if k in self._itens]
+
+    def __len__(self) -> int:
+        return len(self._itens)
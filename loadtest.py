@@ -0,0 +1,251 @@
+# loadtest.py — Conecta Senac • Aprendiz
+# Teste de carga: N sessões simuladas e concorrentes rodando o app.py real
+# ----------------------------------------------------------------------
+# Cada sessão é um AppTest (streamlit.testing) que clica nas SUGESTOES,
+# digita perguntas e percorre os fluxos de endereço e de contato (lead).
+# OpenAI, Tavily, DDGS e o download de artigos são trocados por stubs
+# locais com latência configurável (nenhuma chamada de rede é feita).
+#
+# Uso:
+#   python loadtest.py                          # rampa 1,2,4,8,16 sessões
+#   python loadtest.py --niveis 1,10,50 --lat-llm 0.8 --json carga.json
+#
+# Relata, por nível de concorrência: vazão (turnos/s), latência por turno
+# p50/p95/p99 e memória por sessão (tracemalloc).
+# ----------------------------------------------------------------------
+
+import os
+import sys
+import json
+import time
+import types
+import random
+import argparse
+import tempfile
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+from sessao_headless import compartilhar_runtime
+
+APP_PATH = str(Path(__file__).resolve().parent / "app.py")
+
+# =========================
+# STUBS DOS PROVEDORES
+# =========================
+LATENCIAS = {"llm": 0.5, "busca": 0.3, "scrape": 0.2}
+JITTER = 0.2  # ±20% de variação em cada latência
+
+def _dormir(tipo: str) -> None:
+    base = LATENCIAS.get(tipo, 0.0)
+    if base > 0:
+        time.sleep(base * random.uniform(1 - JITTER, 1 + JITTER))
+
+ARTIGO_HTML = (
+    "<html><head><title>Senac RS abre inscrições</title></head><body><article>"
+    + "".join(f"<p>Parágrafo {i}: o Senac RS oferece cursos de tecnologia, gestão, gastronomia e idiomas "
+              f"em diversas unidades, com turmas presenciais e EAD ao longo do semestre.</p>" for i in range(40))
+    + "</article></body></html>"
+).encode("utf-8")
+
+def _resultados_falsos(q: str, n: int) -> List[dict]:
+    return [{"title": f"Senac RS — resultado {i}", "url": f"https://www.senacrs.com.br/noticias/stub-{abs(hash(q)) % 9999}-{i}",
+             "content": f"Resumo do resultado {i} para '{q}'."} for i in range(n)]
+
+class _Uso:
+    def __init__(self, prompt: int, completion: int):
+        self.prompt_tokens = prompt
+        self.completion_tokens = completion
+        self.total_tokens = prompt + completion
+        self.prompt_tokens_details = types.SimpleNamespace(cached_tokens=0)
+
+class _Completions:
+    def create(self, model=None, messages=None, temperature=None, max_tokens=None, **kw):
+        _dormir("llm")
+        conteudo = json.dumps({"emotion": "feliz", "content": "Resposta simulada do Aprendiz sobre o Senac."}, ensure_ascii=False)
+        prompt = sum(len(m.get("content") or "") for m in (messages or [])) // 4
+        return types.SimpleNamespace(
+            choices=[types.SimpleNamespace(message=types.SimpleNamespace(content=conteudo))],
+            usage=_Uso(prompt, len(conteudo) // 4),
+        )
+
+class OpenAIStub:
+    def __init__(self, *a, **kw):
+        self.chat = types.SimpleNamespace(completions=_Completions())
+        self.audio = types.SimpleNamespace(transcriptions=None)
+
+    def with_options(self, **kw):
+        return self
+
+class TavilyStub:
+    def __init__(self, *a, **kw):
+        pass
+
+    def search(self, query, max_results=5, **kw):
+        _dormir("busca")
+        return {"results": [{"title": r["title"], "url": r["url"], "content": r["content"]}
+                            for r in _resultados_falsos(query, max_results)]}
+
+class DDGSStub:
+    def __init__(self, *a, **kw):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def text(self, q, max_results=5, **kw):
+        _dormir("busca")
+        return [{"title": r["title"], "href": r["url"], "body": r["content"]} for r in _resultados_falsos(q, max_results)]
+
+class _RespostaHTTP:
+    status_code = 200
+    headers: Dict[str, str] = {}
+    content = ARTIGO_HTML
+    ok = True
+
+    def raise_for_status(self):
+        return None
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+def _requests_get_stub(url, *a, **kw):
+    _dormir("scrape")
+    return _RespostaHTTP()
+
+def instalar_stubs() -> None:
+    """Registra os stubs em sys.modules ANTES de o app importar os SDKs."""
+    sys.modules["openai"] = types.SimpleNamespace(OpenAI=OpenAIStub)
+    sys.modules["tavily"] = types.SimpleNamespace(TavilyClient=TavilyStub)
+    sys.modules["ddgs"] = types.SimpleNamespace(DDGS=DDGSStub)
+    try:
+        import requests
+        requests.get = _requests_get_stub
+    except Exception:
+        pass
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    os.environ.setdefault("TAVILY_API_KEY", "stub")
+    os.environ["CRAWLER_INTERVALO"] = "0"  # nada de crawler em segundo plano durante a carga
+
+# =========================
+# ROTEIRO DE UMA SESSÃO
+# =========================
+TEMAS = ["tecnologia", "gastronomia", "gestão", "idiomas", "saúde", "beleza", "design", "moda"]
+CIDADES = ["Porto Alegre", "Caxias do Sul", "Pelotas", "Santa Maria", "Passo Fundo"]
+
+def roteiro(n: int) -> List[Tuple[str, object]]:
+    """Ações de uma sessão: ("clique", índice da sugestão) ou ("texto", mensagem)."""
+    tema = TEMAS[n % len(TEMAS)]
+    return [
+        ("clique", n % 5),
+        ("texto", f"Quais cursos de {tema} o Senac tem? (sessão {n})"),
+        ("texto", f"notícias do senac sobre {tema}"),
+        ("texto", "onde fica a unidade mais próxima?"),
+        ("texto", CIDADES[n % len(CIDADES)]),
+        ("texto", "quero me inscrever"),
+        ("texto", f"Visitante{n} visitante{n}@exemplo.com"),
+    ]
+
+def rodar_sessao(n: int, timeout: float, guardar: list) -> List[float]:
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    at.run()
+    latencias = []
+    for acao, arg in roteiro(n):
+        t0 = time.perf_counter()
+        if acao == "clique":
+            at.button[arg].click().run()
+        else:
+            at.chat_input[0].set_value(arg).run()
+        latencias.append(time.perf_counter() - t0)
+        if at.exception:
+            raise RuntimeError(f"sessão {n}: {at.exception[0].message}")
+    guardar.append(at)  # mantém a sessão viva até medir a memória
+    return latencias
+
+# =========================
+# RAMPA DE CONCORRÊNCIA
+# =========================
+def _percentil(valores: List[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    v = sorted(valores)
+    k = (len(v) - 1) * p / 100
+    f = int(k)
+    c = min(f + 1, len(v) - 1)
+    return v[f] + (v[c] - v[f]) * (k - f)
+
+def medir_nivel(sessoes: int, timeout: float, memoria: bool) -> Dict[str, float]:
+    vivas: list = []
+    if memoria:
+        tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessoes) as pool:
+        resultados = list(pool.map(lambda n: rodar_sessao(n, timeout, vivas), range(sessoes)))
+    duracao = time.perf_counter() - t0
+    mem_sessao = 0.0
+    if memoria:
+        mem_sessao = (tracemalloc.get_traced_memory()[0] - base) / max(1, sessoes)
+        tracemalloc.stop()
+    vivas.clear()
+
+    lats = [x for r in resultados for x in r]
+    return {
+        "sessoes": sessoes,
+        "turnos": len(lats),
+        "duracao_s": round(duracao, 3),
+        "vazao_turnos_s": round(len(lats) / duracao, 2) if duracao else 0.0,
+        "p50_s": round(_percentil(lats, 50), 3),
+        "p95_s": round(_percentil(lats, 95), 3),
+        "p99_s": round(_percentil(lats, 99), 3),
+        "mem_sessao_kb": round(mem_sessao / 1024, 1),
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Teste de carga do app.py com provedores simulados.")
+    ap.add_argument("--niveis", default="1,2,4,8,16", help="níveis de concorrência (sessões simultâneas)")
+    ap.add_argument("--lat-llm", type=float, default=LATENCIAS["llm"], help="latência do LLM simulado (s)")
+    ap.add_argument("--lat-busca", type=float, default=LATENCIAS["busca"], help="latência de Tavily/DDGS simulados (s)")
+    ap.add_argument("--lat-scrape", type=float, default=LATENCIAS["scrape"], help="latência do download de artigos (s)")
+    ap.add_argument("--timeout", type=float, default=120, help="timeout de cada execução do script (s)")
+    ap.add_argument("--sem-memoria", action="store_true", help="não mede memória (tracemalloc deixa tudo mais lento)")
+    ap.add_argument("--json", help="grava os resultados neste arquivo")
+    args = ap.parse_args(argv)
+
+    LATENCIAS.update(llm=args.lat_llm, busca=args.lat_busca, scrape=args.lat_scrape)
+    instalar_stubs()
+    compartilhar_runtime()
+    saida = Path(args.json).resolve() if args.json else None
+    # O app grava respostas/ e lê acervo/ relativos ao cwd: isola a carga num diretório temporário
+    os.chdir(tempfile.mkdtemp(prefix="carga-aprendiz-"))
+
+    # Sessão de aquecimento (fora das métricas): importações, caches e compilação do script
+    rodar_sessao(0, args.timeout, [])
+
+    niveis = [int(x) for x in args.niveis.split(",") if x.strip()]
+    print(f"{'sessões':>8} {'turnos':>7} {'vazão/s':>8} {'p50':>7} {'p95':>7} {'p99':>7} {'KB/sessão':>10}")
+    relatorio = []
+    for n in niveis:
+        r = medir_nivel(n, args.timeout, not args.sem_memoria)
+        relatorio.append(r)
+        print(f"{r['sessoes']:>8} {r['turnos']:>7} {r['vazao_turnos_s']:>8} {r['p50_s']:>7} "
+              f"{r['p95_s']:>7} {r['p99_s']:>7} {r['mem_sessao_kb']:>10}", flush=True)
+
+    if saida:
+        saida.write_text(json.dumps(relatorio, ensure_ascii=False, indent=2), encoding="utf-8")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+# lote.py — Conecta Senac • Aprendiz
+# Geração em lote de respostas (FAQ de campanhas) sem interface
+# ----------------------------------------------------------------------
+# Lê um JSONL de perguntas ({"question": "..."} ou {"pergunta": "..."}, com
+# "id" opcional) e roda cada uma pelo app.py real (AppTest, sem navegador),
+# ou seja, pela mesma gerar_resposta_json do chat, com paralelismo limitado.
+#
+# Cada resposta é gravada em respostas/ no formato de sempre e também
+# acrescentada ao JSONL de saída (padrão: respostas/faq.jsonl), que o app
+# carrega como cache quente de respostas prontas.
+#
+# Retomável: perguntas que já estão na saída são puladas.
+#
+# Uso:
+#   python lote.py perguntas.jsonl
+#   python lote.py perguntas.jsonl --saida respostas/faq.jsonl --paralelo 4
+# ----------------------------------------------------------------------
+
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Optional, Set
+
+from normalizacao import normalizar_pergunta
+
+APP_PATH = str(Path(__file__).resolve().parent / "app.py")
+SAIDA_PADRAO = Path("respostas") / "faq.jsonl"
+
+def ler_perguntas(path: Path) -> List[dict]:
+    perguntas = []
+    with open(path, encoding="utf-8") as f:
+        for n, linha in enumerate(f, 1):
+            linha = linha.strip()
+            if not linha:
+                continue
+            try:
+                r = json.loads(linha)
+            except json.JSONDecodeError:
+                print(f"[lote] linha {n} ignorada (JSON inválido)", file=sys.stderr)
+                continue
+            q = (r.get("question") or r.get("pergunta") or "").strip()
+            if q:
+                perguntas.append({"id": r.get("id"), "question": q})
+    return perguntas
+
+def ja_respondidas(saida: Path) -> Set[str]:
+    feitas: Set[str] = set()
+    if not saida.exists():
+        return feitas
+    with open(saida, encoding="utf-8") as f:
+        for linha in f:
+            try:
+                r = json.loads(linha)
+            except json.JSONDecodeError:
+                continue  # linha truncada por interrupção: a pergunta é refeita
+            if r.get("question") and r.get("content"):
+                feitas.add(normalizar_pergunta(r["question"]))
+    return feitas
+
+def responder(pergunta: str, timeout: float) -> dict:
+    """Roda uma pergunta numa sessão nova do app e devolve o JSON gravado em respostas/."""
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    at.run()
+    at.chat_input[0].set_value(pergunta).run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    path = at.session_state["ultima_resposta_path"] if "ultima_resposta_path" in at.session_state else None
+    if not path:
+        raise RuntimeError("o app não gravou resposta")
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Gera respostas em lote para um JSONL de perguntas.")
+    ap.add_argument("entrada", help="JSONL de perguntas")
+    ap.add_argument("--saida", default=str(SAIDA_PADRAO), help="JSONL de respostas (cache quente do app)")
+    ap.add_argument("--paralelo", type=int, default=4, help="perguntas simultâneas")
+    ap.add_argument("--orcamento", type=float, default=60, help="orçamento de latência por pergunta (s)")
+    ap.add_argument("--timeout", type=float, default=180, help="timeout de cada execução do script (s)")
+    args = ap.parse_args(argv)
+
+    os.environ["APP_ORCAMENTO_TURNO"] = str(args.orcamento)  # sem usuário esperando: orçamento folgado
+    os.environ["CRAWLER_INTERVALO"] = "0"
+    if args.paralelo > 1:
+        from sessao_headless import compartilhar_runtime  # sessões AppTest em threads
+        compartilhar_runtime()
+
+    saida = Path(args.saida)
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    feitas = ja_respondidas(saida)
+    pendentes, vistas = [], set(feitas)
+    for p in ler_perguntas(Path(args.entrada)):
+        chave = normalizar_pergunta(p["question"])
+        if chave not in vistas:
+            vistas.add(chave)
+            pendentes.append(p)
+    print(f"[lote] {len(feitas)} já respondidas, {len(pendentes)} pendentes")
+
+    ok = falhas = 0
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.paralelo)) as pool, open(saida, "a", encoding="utf-8") as out:
+        futuros = {pool.submit(responder, p["question"], args.timeout): p for p in pendentes}
+        for fut in as_completed(futuros):
+            p = futuros[fut]
+            try:
+                r = fut.result()
+            except Exception as e:
+                falhas += 1
+                print(f"[lote] falhou: {p['question'][:60]!r}: {e}", file=sys.stderr)
+                continue
+            registro = {"id": p["id"], "question": p["question"], "emotion": r.get("emotion"),
+                        "content": r.get("content"), "sources": r.get("sources") or [], "turno": r.get("turno")}
+            out.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            out.flush()  # progresso em disco a cada resposta (retomável)
+            ok += 1
+            print(f"[lote] {ok + falhas}/{len(pendentes)} {p['question'][:60]!r}")
+
+    print(f"[lote] fim: {ok} respondidas, {falhas} falhas em {time.perf_counter() - t0:.1f}s")
+    return 1 if falhas else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,14 @@
+# normalizacao.py — Conecta Senac • Aprendiz
+# Normalização de perguntas compartilhada entre o app e o lote
+# ----------------------------------------------------------------------
+# É a chave do cache de respostas prontas: o lote.py grava as perguntas e
+# o app.py as procura, então os dois PRECISAM normalizar do mesmo jeito.
+# ----------------------------------------------------------------------
+
+import re
+import unicodedata
+
+def normalizar_pergunta(text: str) -> str:
+    """Sem acentos, minúsculas, só letras/dígitos separados por um espaço."""
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode("ascii")
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text.lower()).split())
@@ -0,0 +1,75 @@
+# relatorio_tokens.py — Conecta Senac • Aprendiz
+# Relatório de uso de tokens por tipo de turno
+# ----------------------------------------------------------------------
+# Lê respostas/tokens.jsonl (uma linha por chamada ao LLM, gravada pelo
+# app.py) e resume por tipo de turno (padrao, busca, endereco, fora_escopo,
+# ambiguo): chamadas, tokens de prompt/resposta e quanto do prompt veio do
+# cache do provedor.
+#
+# Uso:
+#   python relatorio_tokens.py
+#   python relatorio_tokens.py --arquivo respostas/tokens.jsonl --desde 2026-10-01
+# ----------------------------------------------------------------------
+
+import sys
+import json
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ARQUIVO_PADRAO = Path("respostas") / "tokens.jsonl"
+
+def ler_registros(path: Path, desde: Optional[str] = None) -> List[dict]:
+    registros = []
+    with open(path, encoding="utf-8") as f:
+        for linha in f:
+            try:
+                r = json.loads(linha)
+            except json.JSONDecodeError:
+                continue
+            if desde and (r.get("ts") or "") < desde:
+                continue
+            registros.append(r)
+    return registros
+
+def resumir(registros: List[dict]) -> Dict[str, dict]:
+    por_tipo: Dict[str, dict] = {}
+    for r in registros:
+        t = por_tipo.setdefault(r.get("tipo") or "?", {"chamadas": 0, "prompt": 0, "completion": 0, "cached": 0})
+        t["chamadas"] += 1
+        t["prompt"] += r.get("prompt_tokens", 0)
+        t["completion"] += r.get("completion_tokens", 0)
+        t["cached"] += r.get("cached_tokens", 0)
+    return por_tipo
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Resumo de tokens por tipo de turno.")
+    ap.add_argument("--arquivo", default=str(ARQUIVO_PADRAO), help="log JSONL gravado pelo app")
+    ap.add_argument("--desde", help="só registros a partir desta data/hora (ISO, ex.: 2026-10-01)")
+    ap.add_argument("--json", action="store_true", help="imprime o resumo em JSON")
+    args = ap.parse_args(argv)
+
+    path = Path(args.arquivo)
+    if not path.exists():
+        print(f"Arquivo não encontrado: {path}", file=sys.stderr)
+        return 1
+    por_tipo = resumir(ler_registros(path, args.desde))
+    total = {"chamadas": 0, "prompt": 0, "completion": 0, "cached": 0}
+    for t in por_tipo.values():
+        for k in total:
+            total[k] += t[k]
+
+    if args.json:
+        print(json.dumps({"por_tipo": por_tipo, "total": total}, ensure_ascii=False, indent=2))
+        return 0
+
+    print(f"{'tipo':<12} {'chamadas':>9} {'prompt':>10} {'médio':>7} {'resposta':>10} {'médio':>7} {'cache':>10} {'% cache':>8}")
+    for nome, t in sorted(por_tipo.items(), key=lambda x: -x[1]["prompt"]) + [("TOTAL", total)]:
+        n = max(1, t["chamadas"])
+        pct = 100 * t["cached"] / t["prompt"] if t["prompt"] else 0.0
+        print(f"{nome:<12} {t['chamadas']:>9} {t['prompt']:>10} {t['prompt'] // n:>7} "
+              f"{t['completion']:>10} {t['completion'] // n:>7} {t['cached']:>10} {pct:>7.1f}%")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
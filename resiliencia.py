@@ -0,0 +1,109 @@
+# resiliencia.py — Conecta Senac • Aprendiz
+# Orçamento de tempo por turno e circuit breaker dos provedores de busca
+# ----------------------------------------------------------------------
+# Classes puras (sem Streamlit), importadas pelo app.py e testadas em
+# tests/test_resiliencia.py. Os valores de configuração (orçamento,
+# reserva do LLM, limites do disjuntor) continuam no app.py e são
+# passados aqui na construção.
+# ----------------------------------------------------------------------
+
+import time
+import threading
+from typing import List, Optional
+
+# =========================
+# ORÇAMENTO DE LATÊNCIA POR TURNO
+# =========================
+class Prazo:
+    """Orçamento de tempo de um turno, repassado a busca, leitura e LLM.
+    Guarda as degradações aplicadas (ex.: 'so_snippets', 'sem_busca', 'max_tokens_reduzido')."""
+
+    def __init__(self, total: float, reserva_llm: float = 0.0):
+        self.total = total
+        self.reserva_llm = reserva_llm
+        self.inicio = time.monotonic()
+        self.degradacoes: List[str] = []
+
+    def restante(self) -> float:
+        return max(0.0, self.total - (time.monotonic() - self.inicio))
+
+    def antes_do_llm(self) -> float:
+        """Tempo disponível para as etapas anteriores ao LLM."""
+        return self.restante() - self.reserva_llm
+
+    def degradar(self, nome: str) -> None:
+        if nome not in self.degradacoes:
+            self.degradacoes.append(nome)
+
+    def resumo(self) -> dict:
+        return {"orcamento_s": self.total,
+                "latencia_s": round(time.monotonic() - self.inicio, 3),
+                "degradacoes": list(self.degradacoes)}
+
+# =========================
+# SAÚDE DOS PROVEDORES (circuit breaker)
+# =========================
+class Disjuntor:
+    """Circuit breaker de um provedor: fechado → (falhas) → aberto → (espera) → meio-aberto → fechado/aberto.
+    Aberto, o provedor é pulado na hora, sem pagar um timeout a cada consulta nova.
+
+    Todo permitir() == True precisa terminar em sucesso(), falha() ou inconclusivo():
+    no meio-aberto só a chamada de teste passa, e sem desfecho ela prende o disjuntor."""
+    FECHADO, ABERTO, MEIO_ABERTO = "fechado", "aberto", "meio-aberto"
+
+    def __init__(self, nome: str, falhas_max: int = 3, espera: float = 60.0):
+        self.nome = nome
+        self.falhas_max = falhas_max
+        self.espera = espera
+        self.estado = self.FECHADO
+        self.falhas = 0
+        self.aberto_em = 0.0
+        self.total_ok = 0
+        self.total_falhas = 0
+        self.ultimo_erro = ""
+        self._lock = threading.Lock()
+
+    def permitir(self) -> bool:
+        with self._lock:
+            if self.estado == self.FECHADO:
+                return True
+            if self.estado == self.ABERTO and time.monotonic() - self.aberto_em >= self.espera:
+                self.estado = self.MEIO_ABERTO  # só esta chamada testa o provedor
+                return True
+            return False
+
+    def sucesso(self) -> None:
+        with self._lock:
+            self.estado = self.FECHADO
+            self.falhas = 0
+            self.total_ok += 1
+
+    def falha(self, erro: Exception) -> None:
+        with self._lock:
+            self.falhas += 1
+            self.total_falhas += 1
+            self.ultimo_erro = f"{type(erro).__name__}: {erro}"[:200]
+            if self.estado == self.MEIO_ABERTO or self.falhas >= self.falhas_max:
+                self.estado = self.ABERTO
+                self.aberto_em = time.monotonic()
+
+    def inconclusivo(self) -> None:
+        """Chamada que não diz nada sobre o provedor: não conta falha nem sucesso.
+        Se era o teste do meio-aberto, a próxima chamada pode testar de novo."""
+        with self._lock:
+            if self.estado == self.MEIO_ABERTO:
+                self.estado = self.ABERTO
+                self.aberto_em = time.monotonic() - self.espera
+
+def eh_timeout(erro: Exception) -> bool:
+    return (isinstance(erro, TimeoutError) or "timeout" in type(erro).__name__.lower()
+            or "timed out" in str(erro).lower())
+
+def registrar_falha(dj: Disjuntor, erro: Exception, timeout: Optional[float], timeout_min: float) -> None:
+    """Provedor saudável responde bem antes de `timeout_min`: estourar um prazo desses é falha
+    (um provedor travado abre o disjuntor mesmo com o timeout encurtado pelo orçamento). Só um
+    prazo menor que isso, espremido pelo fim do orçamento do turno, não diz nada sobre o provedor."""
+    if timeout is not None and timeout < timeout_min and eh_timeout(erro):
+        dj.inconclusivo()
+    else:
+        dj.falha(erro)
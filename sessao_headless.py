@@ -0,0 +1,42 @@
+# sessao_headless.py — Conecta Senac • Aprendiz
+# Várias sessões do app.py (AppTest) em threads no mesmo processo
+# ----------------------------------------------------------------------
+# Usado pelo loadtest.py (sessões concorrentes) e pelo lote.py (perguntas
+# em paralelo). Não é usado pelo app em produção.
+#
+# O AppTest (streamlit.testing.v1) cria um Runtime global a cada execução
+# e o zera ao terminar. Com várias sessões em threads, uma sessão que
+# termina zera o Runtime de outra no meio do script ("Runtime hasn't been
+# created!"). compartilhar_runtime() troca Runtime.instance/exists para,
+# quando não há Runtime ativo, devolver o último criado. Todos esses
+# Runtimes são mocks equivalentes do AppTest, então compartilhar é seguro
+# AQUI. Num servidor Streamlit de verdade isso não deve ser chamado.
+#
+# Depende de detalhes internos do Streamlit (Runtime._instance); se uma
+# versão nova mudar isso, rode o lote com --paralelo 1, que não precisa
+# do patch.
+# ----------------------------------------------------------------------
+
+from typing import Dict
+
+def compartilhar_runtime() -> None:
+    """Instala o patch uma vez por processo."""
+    from streamlit.runtime import Runtime
+    if getattr(Runtime, "_compartilhado", False):
+        return
+    original_instance = Runtime.instance.__func__
+    original_exists = Runtime.exists.__func__
+    ultimo: Dict[str, object] = {}
+
+    def instance(cls):
+        if cls._instance is not None:
+            ultimo["rt"] = cls._instance
+            return cls._instance
+        return ultimo["rt"] if "rt" in ultimo else original_instance(cls)
+
+    def exists(cls):
+        return cls._instance is not None or "rt" in ultimo or original_exists(cls)
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(exists)
+    Runtime._compartilhado = True
@@ -0,0 +1,115 @@
+# Testes do crawler contra o espelho local em tests/fixtures/espelho
+# (descoberta, GET condicional com 304 e detecção de mudança pelo hash do texto)
+
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+pytest.importorskip("trafilatura")
+
+import crawler
+
+ESPELHO = Path(__file__).resolve().parent / "fixtures" / "espelho"
+SITE = "https://www.senacrs.com.br"
+ROBOTICA = f"{SITE}/noticias/senac-abre-laboratorio-de-robotica"
+FEIRA = f"{SITE}/noticias/feira-de-gastronomia-em-caxias"
+CURSO = f"{SITE}/cursos/tecnico-em-informatica"
+
+@pytest.fixture
+def espelho(tmp_path, monkeypatch):
+    """Cópia do espelho (os testes mexem nos arquivos) e acervo isolado em tmp_path."""
+    raiz = tmp_path / "espelho"
+    shutil.copytree(ESPELHO, raiz)
+    acervo = tmp_path / "acervo"
+    monkeypatch.setattr(crawler, "PAGINAS_DIR", acervo / "paginas")
+    monkeypatch.setattr(crawler, "ESTADO_PATH", acervo / "estado.json")
+    # Arquivos com mtime no passado: um mtime "agora" empataria com o If-Modified-Since
+    for arq in raiz.rglob("*"):
+        if arq.is_file():
+            os.utime(arq, (arq.stat().st_mtime - 3600, arq.stat().st_mtime - 3600))
+    return raiz
+
+def _passada(raiz: Path) -> dict:
+    return crawler.executar_passada(crawler.BuscadorEspelho(str(raiz)),
+                                    sitemaps=[f"{SITE}/sitemap.xml"],
+                                    listagens=[f"{SITE}/noticias"], log=lambda *_: None)
+
+def _arquivo(raiz: Path, url: str) -> Path:
+    return raiz / "www.senacrs.com.br" / (url.split(f"{SITE}/", 1)[1] + ".html")
+
+def test_descoberta_por_sitemap_e_listagem(espelho):
+    assert _passada(espelho) == {"atualizada": 2}
+    urls = {d["url"] for d in crawler.carregar_acervo()}
+    # /sobre (sitemap) e o curso (listagem) estão fora do FILTRO_URL
+    assert urls == {ROBOTICA, FEIRA}
+    assert CURSO not in crawler._carregar_estado()["paginas"]
+    assert not crawler._trava_path().exists()
+
+def test_revisita_sem_mudanca_devolve_304(espelho, monkeypatch):
+    _passada(espelho)
+    # Sem lastmod no sitemap: nada a revisitar até REVISITA_SEG vencer
+    assert _passada(espelho) == {}
+    monkeypatch.setattr(crawler, "REVISITA_SEG", -1)
+    assert _passada(espelho) == {"nao modificada": 2}
+
+def test_mudanca_de_conteudo_e_detectada_pelo_hash(espelho, monkeypatch):
+    _passada(espelho)
+    monkeypatch.setattr(crawler, "REVISITA_SEG", -1)
+
+    arq = _arquivo(espelho, ROBOTICA)
+    arq.write_text(arq.read_text(encoding="utf-8").replace("robótica educacional", "robótica e automação"),
+                   encoding="utf-8")
+    assert _passada(espelho) == {"atualizada": 1, "nao modificada": 1}
+    doc = next(d for d in crawler.carregar_acervo() if d["url"] == ROBOTICA)
+    assert "robótica e automação" in doc["content"]
+
+    # Arquivo "tocado" (Last-Modified novo) com o mesmo texto: baixa, mas o hash não muda
+    os.utime(_arquivo(espelho, FEIRA))
+    assert _passada(espelho) == {"inalterada": 1, "nao modificada": 1}
+
+def test_pagina_removida_sai_do_acervo(espelho, monkeypatch):
+    _passada(espelho)
+    monkeypatch.setattr(crawler, "REVISITA_SEG", -1)
+    _arquivo(espelho, FEIRA).unlink()
+    assert _passada(espelho) == {"removida": 1, "nao modificada": 1}
+    assert [d["url"] for d in crawler.carregar_acervo()] == [ROBOTICA]
+    assert FEIRA not in crawler._carregar_estado()["paginas"]
+
+def test_erro_do_servidor_nao_renova_a_pagina(espelho, monkeypatch):
+    _passada(espelho)
+    meta = crawler._carregar_estado()["paginas"][ROBOTICA]
+    buscador = crawler.BuscadorEspelho(str(espelho))
+    monkeypatch.setattr(buscador, "get", lambda url, headers=None: (503, {}, b""))
+    novo, situacao = crawler._visitar(buscador, ROBOTICA, None, meta)
+    # visitada_em fica como estava: a página envelhece até sair do acervo
+    assert situacao == "erro 503"
+    assert novo["visitada_em"] == meta["visitada_em"]
+
+def test_pagina_sem_texto_nao_fica_presa_no_304(espelho, monkeypatch):
+    with monkeypatch.context() as m:
+        m.setattr(crawler.extracao, "extrair", lambda corpo, **_: "")
+        assert _passada(espelho) == {"sem texto": 2}
+    # Sem hash no meta não vai If-Modified-Since: a página é baixada e extraída de novo
+    monkeypatch.setattr(crawler, "REVISITA_SEG", -1)
+    assert _passada(espelho) == {"atualizada": 2}
+
+def test_passada_concorrente_e_pulada(espelho):
+    crawler.PAGINAS_DIR.mkdir(parents=True)
+    crawler._trava_path().write_text("123")
+    assert _passada(espelho) == {}
+    assert crawler._trava_path().exists()
+
+def test_busca_no_acervo_so_para_noticias(espelho):
+    _passada(espelho)
+    docs = crawler.carregar_acervo()
+    assert [d["url"] for d in crawler.buscar_acervo(docs, "notícias sobre robótica no Senac")] == [ROBOTICA]
+    # Todos os termos distintivos precisam aparecer
+    assert crawler.buscar_acervo(docs, "notícias de robótica em Caxias") == []
+    # Perguntas de curso/unidade seguem para a busca ao vivo
+    assert crawler.buscar_acervo(docs, "quais cursos de informática tem na unidade centro?") == []
+    assert len(crawler.buscar_acervo(docs, "últimas notícias do senac")) == 2
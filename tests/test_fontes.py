@@ -0,0 +1,33 @@
+# Testes do repositório de fontes compartilhado (deduplicação e despejo LRU)
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fontes import FonteStore
+
+def _fonte(n: int, tamanho: int = 10) -> dict:
+    return {"title": "", "url": f"u{n}", "content": "x" * (tamanho - len(f"u{n}"))}
+
+def test_deduplica_fontes_iguais():
+    store = FonteStore(1000)
+    a = store.guardar([_fonte(1), _fonte(2)])
+    b = store.guardar([_fonte(1)])
+    assert b == a[:1]
+    assert len(store) == 2 and store.bytes == 20
+    assert [f["url"] for f in store.obter(a)] == ["u1", "u2"]
+
+def test_despeja_menos_usadas_acima_do_teto():
+    store = FonteStore(30)
+    c1, c2, c3 = (store.guardar([_fonte(n)])[0] for n in (1, 2, 3))
+    store.guardar([_fonte(1)])          # u1 volta a ser a mais recente
+    store.guardar([_fonte(4)])          # passa do teto: sai u2
+    assert [f["url"] for f in store.obter([c1, c2, c3])] == ["u1", "u3"]
+    assert store.bytes == 30
+
+def test_fonte_maior_que_o_teto_fica_sozinha():
+    store = FonteStore(10)
+    store.guardar([_fonte(1)])
+    chave = store.guardar([_fonte(2, tamanho=50)])[0]
+    assert len(store) == 1 and store.obter([chave])
@@ -0,0 +1,135 @@
+# Testes do orçamento por turno (Prazo) e do circuit breaker (Disjuntor)
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import resiliencia
+from resiliencia import Disjuntor, Prazo, registrar_falha
+
+class Relogio:
+    """time.monotonic controlado pelo teste."""
+    def __init__(self):
+        self.agora = 1000.0
+
+    def __call__(self) -> float:
+        return self.agora
+
+@pytest.fixture
+def relogio(monkeypatch):
+    r = Relogio()
+    monkeypatch.setattr(resiliencia.time, "monotonic", r)
+    return r
+
+def _abrir(dj: Disjuntor) -> None:
+    for _ in range(dj.falhas_max):
+        assert dj.permitir()
+        dj.falha(ConnectionError("recusada"))
+
+# ---- Prazo ----
+
+def test_prazo_desconta_reserva_do_llm(relogio):
+    p = Prazo(20, reserva_llm=6)
+    relogio.agora += 5
+    assert p.restante() == 15
+    assert p.antes_do_llm() == 9
+    relogio.agora += 30
+    assert p.restante() == 0
+
+def test_prazo_registra_degradacoes_sem_repetir(relogio):
+    p = Prazo(10)
+    p.degradar("sem_busca")
+    p.degradar("sem_busca")
+    relogio.agora += 1.25
+    assert p.resumo() == {"orcamento_s": 10, "latencia_s": 1.25, "degradacoes": ["sem_busca"]}
+
+# ---- Disjuntor ----
+
+def test_abre_depois_de_falhas_seguidas(relogio):
+    dj = Disjuntor("X", falhas_max=3, espera=60)
+    dj.falha(ConnectionError("1"))
+    dj.sucesso()  # sucesso zera a sequência
+    dj.falha(ConnectionError("1"))
+    dj.falha(ConnectionError("2"))
+    assert dj.estado == Disjuntor.FECHADO and dj.permitir()
+    dj.falha(ConnectionError("3"))
+    assert dj.estado == Disjuntor.ABERTO
+    assert not dj.permitir()
+    assert dj.ultimo_erro == "ConnectionError: 3"
+
+def test_meio_aberto_deixa_passar_uma_chamada(relogio):
+    dj = Disjuntor("X", falhas_max=3, espera=60)
+    _abrir(dj)
+    relogio.agora += 59
+    assert not dj.permitir()
+    relogio.agora += 1
+    assert dj.permitir()
+    assert dj.estado == Disjuntor.MEIO_ABERTO
+    assert not dj.permitir()  # só a chamada de teste
+
+def test_meio_aberto_sucesso_fecha(relogio):
+    dj = Disjuntor("X", falhas_max=3, espera=60)
+    _abrir(dj)
+    relogio.agora += 60
+    assert dj.permitir()
+    dj.sucesso()
+    assert dj.estado == Disjuntor.FECHADO and dj.permitir()
+
+def test_meio_aberto_falha_reabre_na_hora(relogio):
+    dj = Disjuntor("X", falhas_max=3, espera=60)
+    _abrir(dj)
+    relogio.agora += 60
+    assert dj.permitir()
+    dj.falha(ConnectionError("ainda fora"))  # uma falha basta no meio-aberto
+    assert dj.estado == Disjuntor.ABERTO
+    assert not dj.permitir()
+    relogio.agora += 60
+    assert dj.permitir()
+
+def test_meio_aberto_sem_desfecho_fica_preso(relogio):
+    # O contrato: quem recebe permitir() == True precisa relatar o desfecho
+    dj = Disjuntor("X", falhas_max=3, espera=60)
+    _abrir(dj)
+    relogio.agora += 60
+    assert dj.permitir()
+    relogio.agora += 3600
+    assert not dj.permitir()
+
+def test_inconclusivo_no_meio_aberto_libera_novo_teste(relogio):
+    dj = Disjuntor("X", falhas_max=3, espera=60)
+    _abrir(dj)
+    relogio.agora += 60
+    assert dj.permitir()
+    dj.inconclusivo()
+    assert dj.estado == Disjuntor.ABERTO
+    assert dj.permitir()  # sem esperar de novo
+    assert dj.total_falhas == 3
+
+def test_inconclusivo_fechado_nao_muda_nada(relogio):
+    dj = Disjuntor("X", falhas_max=3, espera=60)
+    dj.falha(ConnectionError("1"))
+    dj.inconclusivo()
+    assert dj.estado == Disjuntor.FECHADO and dj.falhas == 1
+
+# ---- registrar_falha ----
+
+@pytest.mark.parametrize("timeout, erro, conta", [
+    (14.0, TimeoutError("read timed out"), True),   # provedor travado, mesmo com prazo encurtado
+    (None, TimeoutError("read timed out"), True),
+    (1.0, TimeoutError("read timed out"), False),   # prazo espremido pelo fim do orçamento
+    (1.0, ConnectionError("recusada"), True),       # erro que não é timeout sempre conta
+])
+def test_registrar_falha(relogio, timeout, erro, conta):
+    dj = Disjuntor("X", falhas_max=3, espera=60)
+    registrar_falha(dj, erro, timeout, timeout_min=3.0)
+    assert dj.falhas == (1 if conta else 0)
+
+def test_eh_timeout_reconhece_excecoes_dos_sdks():
+    class ReadTimeout(Exception):
+        pass
+    assert resiliencia.eh_timeout(ReadTimeout("x"))
+    assert resiliencia.eh_timeout(RuntimeError("operation timed out"))
+    assert not resiliencia.eh_timeout(ConnectionError("recusada"))